@@ -0,0 +1,45 @@
+"""
+Tokenizing and parsing time of a rule file of 10k patterns, run from the
+repository root:
+
+    python -m benchmarks.bench_parse
+"""
+import random
+import time
+
+from regex.parser import ast_from_string
+
+
+PIECES = (
+    'ERROR', 'user', 'id=', r'\d+', r'\w+', r'\s*', '[a-z0-9_]+', '[^ ]*', '.',
+    r'\x41', '(GET|POST|PUT)', '[0-9]{1,3}', r'\.', '-', ':', 'a?', 'b*', '$',
+)
+
+
+def make_patterns(n: int, seed=0):
+    rnd = random.Random(seed)
+    patterns = []
+    for _ in range(n):
+        alternatives = [
+            ''.join(rnd.choice(PIECES) for _ in range(rnd.randint(3, 12)))
+            for _ in range(rnd.randint(1, 3))
+        ]
+        patterns.append('|'.join(alternatives))
+    return patterns
+
+
+def main():
+    patterns = make_patterns(10000)
+    n_chars = sum(map(len, patterns))
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for pattern in patterns:
+            ast_from_string(pattern)
+        best = min(best, time.perf_counter() - start)
+    print('{} patterns, {} characters: {:.3f} s, {:.1f} us/pattern, {:.2f} M chars/s'.format(
+        len(patterns), n_chars, best, best / len(patterns) * 1e6, n_chars / best / 1e6))
+
+
+if __name__ == '__main__':
+    main()
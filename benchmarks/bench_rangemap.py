@@ -0,0 +1,35 @@
+"""
+Lookup time of the RangeMap backends, run from the repository root:
+
+    python -m benchmarks.bench_rangemap
+"""
+import random
+import timeit
+
+from regex.ranged import RangeMap, ArrayRangeMap, MAX_CHAR
+
+
+def make_rangemap(n_ranges: int) -> RangeMap:
+    rm = RangeMap()
+    for i in range(n_ranges):
+        start = chr(i * 16)
+        rm.add_range(start, chr(i * 16 + 7), {i})
+    return rm
+
+
+def main():
+    random.seed(0)
+    for n_ranges in (4, 64, 1024):
+        rm = make_rangemap(n_ranges)
+        chars = [ chr(random.randrange(n_ranges * 16)) for _ in range(10000) ]
+        chars.append(MAX_CHAR)
+        for name, backend in (('skiplist', rm), ('array', ArrayRangeMap.from_rangemap(rm))):
+            get_char = backend.get_char
+            seconds = min(timeit.repeat(
+                lambda: [ get_char(ch) for ch in chars ], number=1, repeat=5))
+            print('{:>5} ranges {:>8}: {:8.1f} ns/lookup'.format(
+                n_ranges, name, seconds / len(chars) * 1e9))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Compile time and state counts of counted repetition as the bounds grow, against
+spelling the copies out with ``?``, run from the repository root:
+
+    python -m benchmarks.bench_repeat
+"""
+import time
+
+from regex.parser import ast_from_string
+from regex.statemachine import ast_to_nfa
+from regex.table import DfaTable
+
+
+# pattern with a bound n, and the same pattern with the copies spelled out
+FAMILIES = (
+    ('[0-9]{1,n}', lambda n: '[0-9]{{1,{}}}'.format(n),
+     lambda n: '[0-9]' + '[0-9]?' * (n - 1)),
+    ('.{0,n}x', lambda n: '.{{0,{}}}x'.format(n),
+     lambda n: '.?' * n + 'x'),
+    ('\\w{n}@', lambda n: '\\w{{{}}}@'.format(n),
+     lambda n: '\\w' * n + '@'),
+)
+
+
+def measure(pattern):
+    start = time.perf_counter()
+    nfa = ast_to_nfa(ast_from_string(pattern))
+    table = DfaTable.from_nfa(nfa)
+    seconds = time.perf_counter() - start
+    return seconds, len(nfa.states()), len(table)
+
+
+def main():
+    print('{:<12} {:>5} {:>10} {:>10} {:>7} {:>7}'.format(
+        'family', 'n', 'repeat ms', 'copies ms', 'nfa', 'dfa'))
+    for name, repeat, copies in FAMILIES:
+        for n in (8, 32, 64, 200, 1000):
+            seconds, nfa_states, dfa_states = measure(repeat(n))
+            copies_seconds, _, copies_dfa_states = measure(copies(n))
+            assert copies_dfa_states == dfa_states
+            print('{:<12} {:>5} {:>10.2f} {:>10.2f} {:>7} {:>7}'.format(
+                name, n, seconds * 1e3, copies_seconds * 1e3, nfa_states, dfa_states))
+
+
+if __name__ == '__main__':
+    main()
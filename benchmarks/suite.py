@@ -0,0 +1,175 @@
+"""
+Benchmarks of compile time, DFA size, memory and match throughput, run from the
+repository root:
+
+    python -m benchmarks.suite -o results.json
+    python -m benchmarks.suite --compare old.json results.json
+
+Results are written as JSON so that revisions can be compared.
+"""
+import argparse
+import json
+import platform
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from regex.api import compile
+from regex.parser import ast_from_string
+from regex.statemachine import ast_to_nfa
+from regex.table import DfaTable
+from regex.tokenizer import scan
+
+
+def alternation(n):
+    return '|'.join('keyword{}'.format(i) for i in range(n))
+
+
+# name: (pattern, text to match, whether re gives the same matches)
+# leftmost-longest and leftmost-first agree on these patterns
+FAMILIES = {
+    'literal': ('hello world', 'xx hello world yy ' * 2000, True),
+    'literal_long': ('a' * 200, 'b' * 30000 + 'a' * 200, True),
+    'bracket_large': ('[' + ''.join(chr(0x100 + 2 * i) for i in range(500)) + ']+',
+                      ''.join(chr(0x100 + 2 * (i % 500)) for i in range(30000)), True),
+    'word_class': (r'\w+@\w+\.\w+', 'mail user@example.com, ' * 2000, True),
+    'word_class_unicode': (r'\w+\s\d+', 'été 42 ' * 5000, False),
+    'alternation_100': ('(' + alternation(100) + ')x', 'keyword42x ' * 3000, False),
+    'alternation_1000': ('(' + alternation(1000) + ')x', 'keyword420x ' * 3000, False),
+    'explosion_8': ('.*a' + '.' * 8, 'ab' * 15000, False),
+    'explosion_12': ('.*a' + '.' * 12, 'ab' * 15000, False),
+}
+
+# patterns compiled with unicode=True
+UNICODE_FAMILIES = {'word_class_unicode'}
+
+
+def timeit(func, repeat=3):
+    """
+    :return: best time in seconds, and the result of the last call
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_family(pattern, text, re_comparable, unicode=False):
+    ans = dict(pattern_length=len(pattern), text_length=len(text))
+
+    ans['tokenize_s'], _ = timeit(lambda: scan(pattern))
+    ans['parse_s'], ast = timeit(lambda: ast_from_string(pattern, unicode=unicode))
+    ans['ast_to_nfa_s'], nfa = timeit(lambda: ast_to_nfa(ast))
+    ans['nfa_states'] = len(nfa.states())
+    ans['from_nfa_s'], table = timeit(lambda: DfaTable.from_nfa(nfa), repeat=1)
+    ans['dfa_states'] = len(table)
+    ans['minimize_s'], minimized = timeit(lambda: table.minimize(), repeat=1)
+    ans['minimized_states'] = len(minimized)
+    ans['alphabet_size'] = table.alphabet.size
+    ans['compile_peak_bytes'] = peak_memory(lambda: compile(pattern, unicode=unicode))
+
+    reg = compile(pattern, unicode=unicode)
+    megabytes = len(text.encode('utf-8')) / 1e6
+    seconds, _ = timeit(lambda: reg.match_begin(text))
+    ans['match_begin_mb_s'] = megabytes / seconds
+    seconds, matches = timeit(lambda: reg.findall(text))
+    ans['findall_mb_s'] = megabytes / seconds
+
+    lazy = compile(pattern, backend='lazy', unicode=unicode)
+    seconds, lazy_matches = timeit(lambda: lazy.findall(text))
+    assert lazy_matches == matches
+    ans['lazy_findall_mb_s'] = megabytes / seconds
+
+    ans['pike_compile_s'], pike = timeit(lambda: compile(pattern, backend='pike', unicode=unicode))
+    seconds, pike_end = timeit(lambda: pike.match_begin(text))
+    assert pike_end == reg.match_begin(text)
+    ans['pike_match_begin_mb_s'] = megabytes / seconds
+    ans['dfa_compile_s'], _ = timeit(lambda: compile(pattern, unicode=unicode), repeat=1)
+
+    if re_comparable:
+        compiled = re.compile(pattern)
+        seconds, re_matches = timeit(lambda: compiled.findall(text))
+        assert re_matches == matches, 'semantics differ from re'
+        ans['re_findall_mb_s'] = megabytes / seconds
+
+    return ans
+
+
+def revision():
+    try:
+        out = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL)
+        return out.decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(names):
+    results = dict(
+        revision=revision(),
+        python=sys.version,
+        platform=platform.platform(),
+        time=time.time(),
+        families=dict(),
+    )
+    for name in names:
+        pattern, text, re_comparable = FAMILIES[name]
+        print('running {}'.format(name), file=sys.stderr)
+        results['families'][name] = bench_family(
+            pattern, text, re_comparable, unicode=name in UNICODE_FAMILIES)
+    return results
+
+
+def compare(old, new):
+    """
+    Print new / old of every metric present in both results.
+    """
+    for name, new_metrics in sorted(new['families'].items()):
+        old_metrics = old['families'].get(name)
+        if old_metrics is None:
+            continue
+        for metric, value in sorted(new_metrics.items()):
+            old_value = old_metrics.get(metric)
+            if old_value:
+                print('{:<24} {:<22} {:>12.6g} {:>12.6g} {:>8.2f}x'.format(
+                    name, metric, old_value, value, value / old_value))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-o', '--output', help='write results to this JSON file')
+    parser.add_argument('-f', '--family', action='append', choices=sorted(FAMILIES),
+                        help='run only these families')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='compare two result files instead of running')
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as old, open(args.compare[1]) as new:
+            compare(json.load(old), json.load(new))
+        return
+
+    results = run(args.family or sorted(FAMILIES))
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from functools import lru_cache
+from itertools import chain, repeat
+
+from regex.ranged import MIN_CHAR, MAX_CHAR
+
+
+MIN_CP = ord(MIN_CHAR)
+MAX_CP = ord(MAX_CHAR)
+BMP_SIZE = 0x10000
+ASTRAL_CHAR = chr(BMP_SIZE)
+# distinct translate tables kept for sharing between identical alphabets
+TRANSLATE_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=TRANSLATE_CACHE_SIZE)
+def build_translate_table(bounds: tuple, classes: tuple):
+    """
+    ``str.translate`` table of every BMP character, one byte per entry if class
+    ids fit, 64 KiB instead of 512 KiB for a list.
+
+    :rtype: bytes|array
+    """
+    ends = chain(bounds[1:], (BMP_SIZE,))
+    runs = (
+        repeat(class_id, min(end, BMP_SIZE) - start)
+        for start, end, class_id in zip(bounds, ends, classes) if start < BMP_SIZE
+    )
+    if max(classes) < 256:
+        return bytes(chain.from_iterable(runs))
+    return array('H', chain.from_iterable(runs))
+
+
+class Alphabet:
+    """
+    Partition of MIN_CHAR..MAX_CHAR into character equivalence classes.
+
+    Two characters are in the same class if every transition of the automaton
+    either accepts both or rejects both. The partition is stored as sorted
+    interval starts ``bounds`` and the class id of each interval ``classes``.
+    """
+
+    def __init__(self, bounds, classes):
+        """
+        :type bounds: list[int]
+        :type classes: list[int]
+        """
+        assert bounds[0] == MIN_CP
+        self.bounds = bounds
+        self.classes = classes
+        self.size = max(classes) + 1
+        self._translate_table = None
+
+    def __len__(self):
+        return self.size
+
+    def __repr__(self):
+        return '<{cls} size={size} intervals={intervals}>'.format(
+            cls=self.__class__.__name__, size=self.size, intervals=len(self.bounds),
+        )
+
+    @classmethod
+    def from_range_lists(cls, range_lists):
+        """
+        Build the coarsest partition that does not split any of the given sets.
+
+        :param range_lists: iterable of sorted, disjoint (start, end) code point pairs
+        """
+        # identical sets (eg: many dots) do not refine the partition
+        distinct = set(tuple(ranges) for ranges in range_lists)
+
+        events = dict()     # type: dict[int, Counter]
+        for set_id, ranges in enumerate(distinct):
+            for start, end in ranges:
+                events.setdefault(start, Counter())[set_id] += 1
+                if end < MAX_CP:
+                    events.setdefault(end + 1, Counter())[set_id] -= 1
+        events.setdefault(MIN_CP, Counter())
+
+        # sweep from MIN_CP to MAX_CP, intervals with the same active sets share a class
+        active = Counter()
+        sig_to_class = dict()
+        bounds, classes = [], []
+        for point in sorted(events):
+            active.update(events[point])
+            sig = frozenset(set_id for set_id, count in active.items() if count > 0)
+            class_id = sig_to_class.setdefault(sig, len(sig_to_class))
+            if not classes or classes[-1] != class_id:
+                bounds.append(point)
+                classes.append(class_id)
+
+        return cls(bounds, classes)
+
+    def intervals(self):
+        """
+        :return: iterator of (start, end, class_id), code points inclusive
+        """
+        # bounds may be a memoryview, see regex.serialize
+        ends = chain(self.bounds[1:], (MAX_CP + 1,))
+        return zip(self.bounds, (end - 1 for end in ends), self.classes)
+
+    def ranges_of(self, class_id: int):
+        return [ (start, end) for start, end, cid in self.intervals() if cid == class_id ]
+
+    def classes_of(self, ranges):
+        """
+        Classes covered by a union of ranges. The ranges must not split any class.
+
+        :param ranges: iterable of (start, end) code point pairs
+        :rtype: set[int]
+        """
+        ans = set()
+        for start, end in ranges:
+            i = bisect_right(self.bounds, start) - 1
+            while i < len(self.bounds) and self.bounds[i] <= end:
+                ans.add(self.classes[i])
+                i += 1
+        return ans
+
+    def representatives(self):
+        """
+        :return: a code point for every class
+        """
+        ans = [None] * self.size
+        for start, _, class_id in self.intervals():
+            if ans[class_id] is None:
+                ans[class_id] = start
+        return ans
+
+    def class_of_cp(self, cp: int) -> int:
+        return self.classes[bisect_right(self.bounds, cp) - 1]
+
+    def class_of(self, char: str) -> int:
+        return self.class_of_cp(ord(char))
+
+    @property
+    def translate_table(self):
+        """
+        ``str.translate`` table mapping every BMP character to its class id,
+        shared by alphabets with the same partition.
+        """
+        if self._translate_table is None:
+            self._translate_table = build_translate_table(tuple(self.bounds), tuple(self.classes))
+
+        return self._translate_table
+
+    def classify(self, string: str):
+        """
+        Map a string to a sequence of class ids in bulk.
+
+        :rtype: bytes|list[int]
+        """
+        if self.size > BMP_SIZE:
+            return [ self.class_of_cp(ord(ch)) for ch in string ]
+
+        translated = string.translate(self.translate_table)
+        try:
+            # fast path: at most 256 classes and no astral characters
+            return translated.encode('latin-1')
+        except UnicodeEncodeError:
+            pass
+
+        # astral characters are left untouched by the translate table
+        return [
+            ord(ch) if ch < ASTRAL_CHAR else self.class_of(ch)
+            for ch in translated
+        ]
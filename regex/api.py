@@ -1,63 +1,463 @@
-from regex.parser import ast_from_string
-from regex.statemachine import ast_to_nfa, DfaState
+from collections import namedtuple, OrderedDict
+import threading
+import time
 
+from regex.parser import ast_from_string, reverse_ast, Cat, Star, Dot
+from regex.statemachine import ast_to_nfa
+from regex.table import DfaTable, SubsetConstruction, Budget
+from regex.errors import BudgetExceeded
+from regex.lazy import LazyDfa, DEFAULT_MAX_STATES
+from regex.codegen import CodeTable, MAX_CODEGEN_STATES
+from regex.pike import PikeVM
+from regex.capture import CaptureVM, count_groups
+from regex.stream import StreamMatcher
+from regex.utf8 import ByteTable, BytePikeVM, lower_to_utf8, any_bytes_prefix
+from regex.regexset import RegexSet
+from regex.literal import Prefilter
+from regex import batch, serialize
+from regex.batch import DEFAULT_CHUNKSIZE
 
-__all__ = ('Regex', 'compile', 'match_begin', 'match_full')
+
+__all__ = (
+    'Regex', 'Match', 'RegexSet', 'Budget', 'compile', 'match_begin', 'match_full',
+    'search', 'findall', 'finditer',
+    'purge', 'cache_info', 'set_cache_size', 'load',
+)
+
+
+BACKENDS = ('dfa', 'lazy', 'codegen', 'pike')
+
+StateCounts = namedtuple('StateCounts', ('dfa', 'minimized'))
 
 
 class Regex:
-    def __init__(self, pattern: str, dfa: DfaState):
-        self.pattern, self.dfa = pattern, dfa
+    def __init__(self, pattern: str, table: DfaTable, state_counts: StateCounts=None,
+                 *, backend='dfa', prefilter: Prefilter=None, unicode=False,
+                 budget: Budget=None, fallback: BudgetExceeded=None):
+        """
+        :param fallback: why the DFA was not built and backend is 'lazy'
+                         ('pike' with utf8) instead, None if the requested backend is used
+        """
+        self.pattern, self.table, self.backend = pattern, table, backend
+        self.utf8 = isinstance(table, (ByteTable, BytePikeVM))
+        self.unicode = unicode
+        self.budget, self.fallback = budget, fallback
+        self._reverse_table = None
+        self._vectorized = None
+        self._capture_vm = None
+        self.state_counts = state_counts or StateCounts(dfa=len(table), minimized=None)
+        self.prefilter = prefilter or Prefilter('', '')
 
     def match_begin(self, string: str) -> int:
-        # empty string is a special case, must be determined be DfaState.match_empy
-        # eg: test case "$^" matches ""
-        if string == '':
-            if self.dfa.match_empty:
-                return 0
+        if not self.prefilter.may_match_begin(string):
+            return -1
+        return self.table.match_begin(string)
+
+    def match_full(self, string: str) -> bool:
+        return self.match_begin(string) == len(string)
+
+    def dump(self, *, reverse=False) -> bytes:
+        """
+        Serialize the compiled DFA, see load().
+
+        :param reverse: also dump reverse_table, so that searching the loaded
+                        regex does not compile it again
+        :raise ValueError: backend is 'lazy' or 'pike', or reverse_table fell back
+                           to one of them because of the budget
+        """
+        if self.backend in ('lazy', 'pike'):
+            raise ValueError('can not dump backend {!r}'.format(self.backend))
+        tables = [self.table]
+        if reverse:
+            if isinstance(self.reverse_table, (LazyDfa, PikeVM)):
+                raise ValueError('can not dump reverse_table, it exceeded the budget')
+            tables.append(self.reverse_table)
+        return serialize.dump(
+            self.pattern, tables, self.prefilter.prefix, self.prefilter.factor,
+            utf8=self.utf8, unicode=self.unicode,
+            codegen=self.backend == 'codegen',
+        )
+
+    def match_many(self, strings, *, workers=None, chunksize=DEFAULT_CHUNKSIZE):
+        """
+        match_begin() of every string, lazily and in input order, see regex.batch.
+
+        :param workers: number of processes, defaults to the number of CPUs,
+                        0 matches in this process, which the lazy and pike
+                        backends (and budget fallbacks to them) require
+        :raise ValueError: see regex.batch.match_many()
+        """
+        return batch.match_many(self, strings, workers=workers, chunksize=chunksize)
+
+    def match_vectorized(self, strings):
+        """
+        match_begin() of many strings at once with numpy, see regex.vectorized.
+
+        :rtype: numpy.ndarray
+        """
+        from regex.vectorized import VectorizedDfa
+        self._check_dfa('match_vectorized')
+        if self._vectorized is None:
+            self._vectorized = VectorizedDfa(self.table)
+        return self._vectorized.match_begin(strings)
+
+    def stream(self) -> StreamMatcher:
+        """
+        Matcher for input that arrives in chunks, see StreamMatcher.
+        """
+        self._check_dfa('stream')
+        return StreamMatcher(self.table)
+
+    def _check_dfa(self, name: str):
+        if self.backend == 'pike':
+            raise ValueError('{} needs a DFA, not backend {!r}'.format(name, self.backend))
+
+    @property
+    def reverse_table(self) -> DfaTable:
+        """
+        DFA of the reversed pattern prefixed by ``.*``, built on first use.
+        """
+        if self._reverse_table is None:
+            ast = reverse_ast(ast_from_string(self.pattern, unicode=self.unicode))
+            if self.utf8:
+                nfa = lower_to_utf8(ast_to_nfa(ast), reverse=True)
+                nfa = any_bytes_prefix(nfa)
+                if isinstance(self.table, BytePikeVM):
+                    self._reverse_table = BytePikeVM(nfa)
+                else:
+                    try:
+                        table = DfaTable.from_nfa(nfa, budget=self.budget)
+                    except BudgetExceeded:
+                        self._reverse_table = BytePikeVM(nfa)
+                    else:
+                        self._reverse_table = ByteTable.from_table(table)
+            elif isinstance(self.table, PikeVM):
+                self._reverse_table = PikeVM(ast_to_nfa(Cat(Star(Dot()), ast)))
+            elif isinstance(self.table, LazyDfa):
+                nfa = ast_to_nfa(Cat(Star(Dot()), ast))
+                self._reverse_table = LazyDfa(nfa, max_states=self.table.max_states)
             else:
-                return -1
+                nfa = ast_to_nfa(Cat(Star(Dot()), ast))
+                try:
+                    self._reverse_table = DfaTable.from_nfa(nfa, budget=self.budget)
+                except BudgetExceeded:
+                    self._reverse_table = LazyDfa(nfa, budget=self.budget)
+        return self._reverse_table
+
+    @property
+    def capture_vm(self) -> CaptureVM:
+        """
+        Pike VM of the tagged NFA, built on first use.
+        """
+        if self._capture_vm is None:
+            ast = ast_from_string(self.pattern, unicode=self.unicode)
+            self._capture_vm = CaptureVM(ast_to_nfa(ast), count_groups(ast))
+        return self._capture_vm
 
-        dfa = self.dfa
-        if dfa.is_end:
-            # can match zero length prefix, return 0
-            last_match = -1
+    @property
+    def groups(self) -> int:
+        return self.capture_vm.groups
+
+    def captures(self, string, start: int, end: int):
+        """
+        Spans of the groups of the match string[start:end], (-1, -1) for groups
+        that did not participate.
+
+        :rtype: tuple[(int, int)]
+        """
+        vm = self.capture_vm
+        if self.utf8:
+            text = bytes(string[start:end]).decode('utf-8')
+            # byte offset of each character
+            offsets = [start]
+            for char in text:
+                offsets.append(offsets[-1] + len(char.encode('utf-8')))
         else:
-            # return -1 on no matching prefix
-            last_match = -2
-
-        i = -1  # remove used before assignment warning
-        for i, ch in enumerate(string):
-            dfa = dfa.follow(ch)
-            if dfa is None:
-                return last_match + 1
-            else:
-                if dfa.is_end:
-                    last_match = i
+            text = string[start:end]
+            offsets = range(start, end + 1)
 
-        assert dfa is not None
-        if not dfa.is_end:
-            if dfa.is_dollar_end:
-                last_match = i
+        positions = vm.captures(text, at_begin=start == 0, at_end=end == len(string))
+        assert positions is not None, 'not a match'
+        positions = [ -1 if pos < 0 else offsets[pos] for pos in positions ]
+        return tuple(zip(positions[::2], positions[1::2]))
 
-        return last_match + 1
+    def finditer(self, string: str):
+        """
+        Iterate over the leftmost-longest non-overlapping matches.
 
-    def match_full(self, string: str) -> bool:
-        return self.match_begin(string) == len(string)
+        One backward pass of reverse_table finds every position a match starts
+        at, then each match is extended forward from the leftmost start.
+        """
+        if not self.prefilter.may_match(string):
+            return
+
+        classes = self.table.classify(string)
+        reverse_table = self.reverse_table
+        starts = reverse_table.match_starts(reverse_table.classify(string))
+
+        pos = 0
+        while pos <= len(classes):
+            start = starts.find(1, pos)
+            if start < 0:
+                return
+            if not self.table.is_char_start(classes, start):
+                # empty match inside a multibyte character
+                pos = start + 1
+                continue
+            end = self.table.longest_match(classes, start)
+            assert end >= start
+            yield Match(self, string, start, end)
+
+            # empty match is allowed right after a non-empty one
+            pos = end if end > start else end + 1
+
+    def search(self, string: str):
+        """
+        :rtype: Match|None
+        """
+        return next(self.finditer(string), None)
+
+    def findall(self, string: str):
+        return [ m.group() for m in self.finditer(string) ]
+
+
+class Match:
+    __slots__ = ('re', 'string', '_span', '_group_spans')
+
+    def __init__(self, reg: Regex, string: str, start: int, end: int):
+        self.re, self.string, self._span = reg, string, (start, end)
+        self._group_spans = None    # computed on first access of a group
+
+    def __repr__(self):
+        return '<{cls} span={span} match={match!r}>'.format(
+            cls=self.__class__.__name__, span=self._span, match=self.group(),
+        )
+
+    def span(self, index=0):
+        """
+        :raise IndexError: no such group
+        """
+        if index == 0:
+            return self._span
+        if not 0 < index <= self.re.groups:
+            raise IndexError('no such group: {!r}'.format(index))
+        if self._group_spans is None:
+            self._group_spans = self.re.captures(self.string, *self._span)
+        return self._group_spans[index - 1]
+
+    def start(self, index=0):
+        return self.span(index)[0]
+
+    def end(self, index=0):
+        return self.span(index)[1]
 
+    def group(self, *indexes):
+        """
+        Like re, the whole match without indexes, None for groups that did not
+        participate, a tuple if there are many indexes.
+        """
+        if len(indexes) > 1:
+            return tuple(map(self.group, indexes))
+        start, end = self.span(indexes[0] if indexes else 0)
+        if start < 0:
+            return None
+        return self.string[start:end]
 
-def compile(pattern: str) -> Regex:
-    ast = ast_from_string(pattern)
+    def groups(self, default=None):
+        ans = []
+        for index in range(1, self.re.groups + 1):
+            string = self.group(index)
+            ans.append(default if string is None else string)
+        return tuple(ans)
+
+
+def compile(pattern: str, *, minimize=False, backend='dfa',
+            max_states=DEFAULT_MAX_STATES, utf8=False, unicode=False,
+            budget: Budget=None) -> Regex:
+    """
+    :param minimize: minimize the DFA, only for the dfa and codegen backends
+    :param backend: 'dfa' builds the whole DFA ahead of time,
+        'lazy' builds DFA states on demand while matching,
+        'codegen' generates Python code of match_begin() from the DFA, DFAs
+        over MAX_CODEGEN_STATES states are matched by the table as with 'dfa',
+        'pike' simulates the NFA without building a DFA, cheapest to compile
+        but slowest to match
+    :param max_states: size of the state cache of the lazy backend
+    :param utf8: match UTF-8 encoded bytes-like objects instead of str,
+        offsets are in bytes, only for the dfa backend
+    :param unicode: ``\\w``, ``\\d``, ``\\s`` match unicode characters like the re module,
+        instead of ascii only
+    :param budget: limits of compiling, when exceeded the lazy backend is used
+        instead, within the same limits, and Regex.fallback tells why; with utf8
+        the fallback is the pike backend
+    """
+    started = time.monotonic()
+    if backend not in BACKENDS:
+        raise ValueError('unknown backend: {!r}'.format(backend))
+    if minimize and backend in ('lazy', 'pike'):
+        raise ValueError('can not minimize with backend {!r}'.format(backend))
+    if utf8 and backend != 'dfa':
+        raise ValueError('can not match bytes with backend {!r}'.format(backend))
+
+    ast = ast_from_string(pattern, unicode=unicode)
     nfa = ast_to_nfa(ast)
-    dfa = DfaState.from_nfa(nfa)
-    return Regex(pattern, dfa)
+    prefilter = Prefilter.from_ast(ast, encoding='utf-8' if utf8 else None)
+    if backend == 'pike':
+        return Regex(
+            pattern, PikeVM(nfa), StateCounts(dfa=None, minimized=None),
+            backend=backend, prefilter=prefilter, unicode=unicode,
+        )
+    if backend == 'lazy':
+        table = LazyDfa(nfa, max_states=max_states)
+        return Regex(
+            pattern, table, StateCounts(dfa=None, minimized=None),
+            backend=backend, prefilter=prefilter, unicode=unicode,
+        )
+
+    if utf8:
+        nfa = lower_to_utf8(nfa)
+    sc = SubsetConstruction(nfa)
+    try:
+        table, _ = DfaTable.from_subset_construction(sc, budget=budget, started=started)
+    except BudgetExceeded as exc:
+        if utf8:
+            table, backend = BytePikeVM(nfa), 'pike'
+        else:
+            table, backend = LazyDfa(nfa, max_states=max_states, budget=budget, sc=sc), 'lazy'
+        return Regex(
+            pattern, table, StateCounts(dfa=None, minimized=None),
+            backend=backend, prefilter=prefilter, unicode=unicode, budget=budget, fallback=exc,
+        )
+    state_counts = StateCounts(dfa=len(table), minimized=None)
+    if minimize:
+        table = table.minimize()
+        state_counts = state_counts._replace(minimized=len(table))
+    if utf8:
+        table = ByteTable.from_table(table)
+    if backend == 'codegen':
+        if len(table) <= MAX_CODEGEN_STATES:
+            table = CodeTable.from_table(table)
+        else:
+            backend = 'dfa'
+    return Regex(
+        pattern, table, state_counts, backend=backend, prefilter=prefilter, unicode=unicode,
+        budget=budget,
+    )
+
+
+def load(buffer) -> Regex:
+    """
+    Regex from the result of Regex.dump(). The tables are not copied, they refer
+    to buffer, which may be a mmap of a dumped file.
+    """
+    loaded = serialize.load(buffer)
+    table, backend = loaded.tables[0], 'dfa'
+    if loaded.codegen and len(table) <= MAX_CODEGEN_STATES:
+        table, backend = CodeTable.from_table(table), 'codegen'
+    reg = Regex(
+        loaded.pattern, table, backend=backend,
+        prefilter=Prefilter(loaded.prefix, loaded.factor), unicode=loaded.unicode,
+    )
+    if len(loaded.tables) > 1:
+        reg._reverse_table = loaded.tables[1]
+    return reg
+
+
+CacheInfo = namedtuple('CacheInfo', ('hits', 'misses', 'maxsize', 'currsize'))
+
+
+class RegexCache:
+    """
+    LRU cache of compiled patterns used by the module level functions, safe to
+    use from several threads. Patterns are compiled outside of the lock, two
+    threads missing the same key at once both compile it.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = self.misses = 0
+        self.lock = threading.RLock()
+
+    def compile(self, pattern: str, **kwargs) -> Regex:
+        key = (pattern, tuple(sorted(kwargs.items())))
+        with self.lock:
+            reg = self.data.get(key)
+            if reg is not None:
+                self.hits += 1
+                self.data.move_to_end(key)
+                return reg
+            self.misses += 1
+
+        reg = compile(pattern, **kwargs)
+        with self.lock:
+            if self.maxsize > 0:
+                self.data[key] = reg
+                self.shrink()
+        return reg
+
+    def shrink(self):
+        with self.lock:
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def info(self) -> CacheInfo:
+        with self.lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self.data))
 
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.hits = self.misses = 0
 
+
+DEFAULT_CACHE_SIZE = 512
+
+_cache = RegexCache(DEFAULT_CACHE_SIZE)
+
+
+def purge():
+    """
+    Clear the compiled pattern cache and its counters.
+    """
+    _cache.clear()
+
+
+def cache_info() -> CacheInfo:
+    return _cache.info()
+
+
+def set_cache_size(maxsize: int):
+    """
+    Change the number of compiled patterns kept, 0 disables caching.
+    """
+    if maxsize < 0:
+        raise ValueError('negative cache size')
+    _cache.maxsize = maxsize
+    _cache.shrink()
+
+
+# building a DFA costs more than a few matches
 def match_begin(pattern: str, string: str) -> int:
-    reg = compile(pattern)
+    reg = _cache.compile(pattern, backend='pike')
     return reg.match_begin(string)
 
 
 def match_full(pattern: str, string: str) -> bool:
-    reg = compile(pattern)
+    reg = _cache.compile(pattern, backend='pike')
     return reg.match_full(string)
+
+
+def search(pattern: str, string: str):
+    reg = _cache.compile(pattern)
+    return reg.search(string)
+
+
+def findall(pattern: str, string: str):
+    reg = _cache.compile(pattern)
+    return reg.findall(string)
+
+
+def finditer(pattern: str, string: str):
+    reg = _cache.compile(pattern)
+    return reg.finditer(string)
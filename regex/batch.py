@@ -0,0 +1,73 @@
+"""
+Match one compiled pattern against many strings on a pool of processes.
+
+The regex is dumped once and loaded by every worker in the pool initializer,
+only chunks of strings and lists of results go through the pipes.
+"""
+from collections import deque
+from itertools import islice
+import multiprocessing
+import os
+
+
+DEFAULT_CHUNKSIZE = 1000
+
+_worker_regex = None
+
+
+def _init_worker(dumped: bytes):
+    global _worker_regex
+    from regex.api import load
+    _worker_regex = load(dumped)
+
+
+def _match_chunk(strings):
+    match_begin = _worker_regex.match_begin
+    return [ match_begin(string) for string in strings ]
+
+
+def chunks(iterable, size: int):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def match_many(reg, strings, *, workers=None, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    :type reg: regex.api.Regex
+    :param strings: iterable of strings, consumed lazily
+    :param workers: number of processes, defaults to the number of CPUs,
+                    0 matches in this process
+    :param chunksize: number of strings sent to a worker at once
+    :return: iterator of the results of reg.match_begin(), in input order
+    :raise ValueError: bad workers or chunksize, or workers with a regex that can
+        not be dumped: the lazy and pike backends, also when compile() fell back
+        to them because of a Budget, or the dump does not load
+    """
+    # validate here, not on the first next() of a generator
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 0 or chunksize < 1:
+        raise ValueError('bad workers or chunksize: {}, {}'.format(workers, chunksize))
+    if workers == 0:
+        return map(reg.match_begin, strings)
+    dumped = reg.dump()
+    # a failing pool initializer respawns workers forever, fail here instead
+    from regex.api import load
+    load(dumped)
+    return _match_pool(dumped, strings, workers, chunksize)
+
+
+def _match_pool(dumped: bytes, strings, workers: int, chunksize: int):
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(dumped,)) as pool:
+        # a window of chunks in flight, so the input is not read ahead without bound
+        pending = deque()
+        for chunk in chunks(strings, chunksize):
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().get()
+            pending.append(pool.apply_async(_match_chunk, (chunk,)))
+        while pending:
+            yield from pending.popleft().get()
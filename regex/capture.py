@@ -0,0 +1,100 @@
+"""
+Extraction of capture groups.
+
+The DFA finds the span of a match, then a Pike VM runs over only that span.
+Each NFA state has at most one thread, carrying the positions recorded by the
+tagged states of its path. Threads are kept in priority order, so among the
+paths matching the whole span greedy repeats and earlier alternatives win, and
+extraction stays linear to the length of the span.
+"""
+from regex.parser import BaseNode, Group
+from regex.pike import PikeVM, SparseSet, in_ranges
+from regex.statemachine import NfaPair
+
+
+def count_groups(node: BaseNode) -> int:
+    ans = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Group):
+            ans = max(ans, node.index)
+        stack.extend(child for child in node.children if isinstance(child, BaseNode))
+    return ans
+
+
+class CaptureVM(PikeVM):
+    def __init__(self, nfa_pair: NfaPair, groups: int):
+        super().__init__(nfa_pair)
+        index = { nfa: i for i, nfa in enumerate(self.nfas) }
+        self.groups = groups
+        self.start = index[nfa_pair.start]
+        self.to = [ None if nfa.to is None else index[nfa.to] for nfa in self.nfas ]
+        self.epsilon = [ [ index[to] for to in nfa.epsilon ] for nfa in self.nfas ]
+        self.tags = [ nfa.tag for nfa in self.nfas ]
+
+    def add_thread(self, states: SparseSet, caps: list, i: int, thread, pos: int,
+                   *, at_begin: bool, at_end: bool):
+        """
+        Add the ε-closure of state i to states in priority order, states already
+        in it keep their higher priority thread.
+
+        :param caps: thread of each state in states
+        :param thread: recorded positions of the path to i
+        """
+        stack = [(i, thread)]
+        while stack:
+            i, thread = stack.pop()
+            if i in states:
+                continue
+            tag = self.tags[i]
+            if tag is not None:
+                thread = thread[:tag] + (pos,) + thread[tag + 1:]
+            states.add(i)
+            caps[i] = thread
+
+            if (at_begin and i in self.begin_tokens) or (at_end and i in self.end_tokens):
+                stack.append((self.to[i], thread))
+            # pushed in reverse, so the first ε transition is tried first
+            stack.extend((to, thread) for to in reversed(self.epsilon[i]))
+
+    def captures(self, text: str, *, at_begin: bool, at_end: bool):
+        """
+        Group positions of the highest priority path matching the whole text.
+
+        :param at_begin: whether text is at the beginning of the string, for ``^``
+        :param at_end: whether text is at the end of the string, for ``$``
+        :return: start and end of each group relative to text, -1 if the group
+                 did not participate, None if text does not match
+        :rtype: tuple[int]|None
+        """
+        n = len(text)
+        states, caps = SparseSet(self.n_states), [None] * self.n_states
+        out, out_caps = SparseSet(self.n_states), [None] * self.n_states
+        self.add_thread(
+            states, caps, self.start, (-1,) * (2 * self.groups), 0,
+            at_begin=at_begin, at_end=at_end and n == 0,
+        )
+
+        chars, ranges = self.chars, self.ranges
+        for pos, char in enumerate(text, 1):
+            out.clear()
+            for i in states.dense[:states.size]:
+                expect = chars[i]
+                if expect is not None:
+                    if expect != char:
+                        continue
+                elif ranges[i] is None or not in_ranges(ranges[i], ord(char)):
+                    continue
+                self.add_thread(
+                    out, out_caps, self.to[i], caps[i], pos,
+                    at_begin=False, at_end=at_end and pos == n,
+                )
+            if not out.size:
+                return None
+            states, out = out, states
+            caps, out_caps = out_caps, caps
+
+        if self.end not in states:
+            return None
+        return caps[self.end]
@@ -0,0 +1,151 @@
+"""
+Compile a DFA into Python source of a specialized match function.
+
+Every state becomes a leaf of an if tree bisecting the state ids, testing the
+character class ids inline, the state is a local variable and no table lookup is
+done while matching. A state looping on itself consumes its run of characters in
+a tight inner loop.
+
+The tree costs O(log(states)) comparisons per character against one list lookup
+of the table loop, so only small DFAs are worth generating code for.
+"""
+from regex.table import DfaTable, DEAD
+
+
+# break-even with the table loop on DFAs changing state at every character
+MAX_CODEGEN_STATES = 16
+# more classes than this in a condition are tested with a frozenset
+MAX_INLINE_CLASSES = 4
+
+
+def targets(table: DfaTable, state: int):
+    """
+    :return: dict of target state to the sorted class ids leading to it
+    """
+    size = table.alphabet.size
+    ans = dict()
+    for class_id, to in enumerate(table.trans[state * size:(state + 1) * size]):
+        if to != DEAD:
+            ans.setdefault(to, []).append(class_id)
+    return ans
+
+
+def condition(class_ids, constants) -> str:
+    """
+    Python expression testing whether ``c`` is in class_ids.
+
+    :param constants: frozensets referred to by the expression are added to it
+    """
+    if class_ids == list(range(class_ids[0], class_ids[-1] + 1)) and len(class_ids) > 2:
+        return '{} <= c <= {}'.format(class_ids[0], class_ids[-1])
+    if len(class_ids) > MAX_INLINE_CLASSES:
+        name = 'CLASSES_{}'.format(len(constants))
+        constants[name] = frozenset(class_ids)
+        return 'c in {}'.format(name)
+    return ' or '.join('c == {}'.format(class_id) for class_id in class_ids)
+
+
+def state_body(table: DfaTable, state: int, constants) -> list:
+    """
+    Lines handling character ``c`` in state, indented from column 0.
+    """
+    lines = []
+    others = targets(table, state)
+    loop = others.pop(state, None)
+    if loop is not None:
+        # consume the run of characters staying in this state,
+        # break in the else clause leaves the outer loop at the end of string
+        cond = condition(loop, constants)
+        lines.extend((
+            'if {}:'.format(cond),
+            '    for i, c in it:',
+            '        if not ({}):'.format(cond),
+            '            break',
+            '    else:',
+        ))
+        if table.is_end[state]:
+            lines.append('        last = n')
+        lines.append('        break')
+        if table.is_end[state]:
+            lines.append('    last = i - 1')
+
+    keyword = 'if'
+    for to, class_ids in sorted(others.items()):
+        lines.append('{} {}:'.format(keyword, condition(class_ids, constants)))
+        lines.append('    state = {}'.format(to))
+        if table.is_end[to]:
+            lines.append('    last = i')
+        keyword = 'elif'
+    if keyword == 'if':
+        lines.append('return last')
+    else:
+        lines.append('else:')
+        lines.append('    return last')
+    return lines
+
+
+def dispatch(table: DfaTable, low: int, high: int, indent: str, constants) -> list:
+    """
+    Lines running the body of the current state among low..high-1, states are
+    bisected so that a character costs O(log(states)) comparisons.
+    """
+    if high - low == 1:
+        return [ indent + line for line in state_body(table, low, constants) ]
+    mid = (low + high) // 2
+    test = 'state == {}'.format(low) if mid - low == 1 else 'state < {}'.format(mid)
+    return (
+        ['{}if {}:'.format(indent, test)]
+        + dispatch(table, low, mid, indent + '    ', constants)
+        + ['{}else:'.format(indent)]
+        + dispatch(table, mid, high, indent + '    ', constants)
+    )
+
+
+def generate_source(table: DfaTable, name='match_begin'):
+    """
+    :return: source of the function, and the constants it refers to
+    :rtype: (str, dict)
+    """
+    constants = dict(classify=table.classify)
+    lines = [
+        'def {}(string):'.format(name),
+        '    if not string:',
+        '        return {}'.format(0 if table.match_empty else -1),
+        '    classes = classify(string)',
+        '    n = len(classes)',
+        '    last = {}'.format(0 if table.is_end[0] else -1),
+        '    state = 0',
+        '    it = enumerate(classes, 1)',
+        '    for i, c in it:',
+    ]
+    lines.extend(dispatch(table, 0, len(table), ' ' * 8, constants))
+
+    dollar = [ state for state in range(len(table))
+               if table.is_dollar_end[state] and not table.is_end[state] ]
+    if dollar:
+        constants['DOLLAR_STATES'] = frozenset(dollar)
+        lines.append('    if state in DOLLAR_STATES:')
+        lines.append('        return n')
+    lines.append('    return last')
+    return '\n'.join(lines) + '\n', constants
+
+
+class CodeTable(DfaTable):
+    """
+    DfaTable whose match_begin() is generated Python code, other matching
+    methods use the table as usual.
+    """
+
+    @classmethod
+    def from_table(cls, table: DfaTable):
+        if len(table) > MAX_CODEGEN_STATES:
+            raise ValueError('too many states for code generation: {}'.format(len(table)))
+        code_table = cls(
+            table.alphabet, table.trans, table.is_end, table.is_dollar_end,
+            table.match_empty, inner_start=table.inner_start,
+        )
+        code_table.source, constants = generate_source(table)
+        namespace = dict(constants)
+        exec(compile(code_table.source, '<regex codegen>', 'exec'), namespace)
+        code_table.match_begin = namespace['match_begin']
+        return code_table
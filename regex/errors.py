@@ -1,6 +1,9 @@
 
 
-__all__ = ('ParseError', 'BadRange', 'IllegalEscape', 'UnexpectedToken', 'UnexpectedEOF')
+__all__ = (
+    'ParseError', 'BadRange', 'IllegalEscape', 'UnexpectedToken', 'UnexpectedEOF',
+    'BudgetExceeded',
+)
 
 
 class ParseError(Exception):
@@ -45,3 +48,14 @@ class UnexpectedEOF(UnexpectedToken):
         else:
             got = Token.EOF()
         super().__init__(got=got, expect=expect, msg=msg)
+
+
+class BudgetExceeded(Exception):
+    """
+    Building the DFA went over a limit of Budget.
+    """
+
+    def __init__(self, limit: str, value):
+        super().__init__('{} exceeded: {}'.format(limit, value))
+        self.limit = limit
+        self.value = value
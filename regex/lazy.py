@@ -0,0 +1,96 @@
+from regex.statemachine import NfaPair
+from regex.table import DfaTable, SubsetConstruction, Budget, DEAD, UNKNOWN, STATE_OVERHEAD
+
+
+DEFAULT_MAX_STATES = 10000
+
+
+class LazyDfa(DfaTable):
+    """
+    DFA whose states are built from ε-closures the first time a match reaches them.
+
+    Built states are kept in a cache of at most max_states states, the whole
+    cache is flushed when it is full. Transitions not computed yet are UNKNOWN.
+    """
+
+    def __init__(self, nfa_pair: NfaPair, *, max_states=DEFAULT_MAX_STATES, budget: Budget=None,
+                 sc: SubsetConstruction=None):
+        """
+        :param budget: also keep the cache within its max_states and max_memory
+        :param sc: SubsetConstruction of nfa_pair if already built
+        """
+        assert max_states >= 3
+        self.sc = sc or SubsetConstruction(nfa_pair)
+        if budget is not None:
+            max_states = budget.cache_states(
+                max_states, 8 * self.sc.alphabet.size + STATE_OVERHEAD)
+        self.max_states = max_states
+        self.flush_count = 0
+        self.start_states = self.sc.start_states()
+        self.inner_start_states = self.sc.start_states(at_begin=False)
+        super().__init__(
+            self.sc.alphabet, [], [], [],
+            match_empty=self.sc.match_empty(self.start_states),
+        )
+
+        self.states = []
+        self.set_to_id = dict()
+        self.add_start_states()
+
+    def add_start_states(self):
+        self.add_state(self.start_states)
+        self.inner_start = self.set_to_id.get(self.inner_start_states)
+        if self.inner_start is None:
+            self.inner_start = self.add_state(self.inner_start_states)
+
+    def add_state(self, states) -> int:
+        state = len(self.states)
+        self.states.append(states)
+        self.set_to_id[states] = state
+        self.trans.extend([UNKNOWN] * self.alphabet.size)
+        self.is_end.append(self.sc.is_end(states))
+        self.is_dollar_end.append(self.sc.is_dollar_end(states))
+        return state
+
+    def flush(self):
+        # clear in place, the match loop holds references to these lists
+        del self.states[:]
+        del self.trans[:]
+        del self.is_end[:]
+        del self.is_dollar_end[:]
+        self.set_to_id.clear()
+        self.flush_count += 1
+        self.add_start_states()
+
+    def explore(self, state: int, class_id: int) -> int:
+        next_states = self.sc.move(self.states[state], class_id)
+        if not next_states:
+            to = DEAD
+        elif next_states in self.set_to_id:
+            to = self.set_to_id[next_states]
+        else:
+            if len(self.states) >= self.max_states:
+                # the old id of state is meaningless after flushing,
+                # the caller continues from the returned id
+                self.flush()
+                return self.add_state(next_states)
+            to = self.add_state(next_states)
+
+        self.trans[state * self.alphabet.size + class_id] = to
+        return to
+
+    def state_key(self, state: int):
+        # ids are reassigned after flushing, the bitmask of NFA states is not
+        return self.states[state]
+
+    def state_from_key(self, key) -> int:
+        state = self.set_to_id.get(key)
+        if state is None:
+            if len(self.states) >= self.max_states:
+                self.flush()
+            state = self.add_state(key)
+        return state
+
+    def minimize(self):
+        # states not explored yet have UNKNOWN transitions, same error as compile()
+        raise ValueError("can not minimize with backend 'lazy'")
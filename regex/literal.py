@@ -0,0 +1,143 @@
+from collections import namedtuple
+import os
+
+from regex.parser import (
+    BaseNode, Char, Bracket, CharRange, Dot,
+    Star, Plus, Question, Repeat, Group, Cat, Or, Empty,
+)
+from regex.tokenizer import Token
+
+
+class LiteralInfo(namedtuple('LiteralInfo', ('exact', 'prefix', 'suffix', 'factor'))):
+    """
+    Literals every match of a node must have.
+
+    exact: the only string matched, None if there are many
+    prefix, suffix: every match starts, ends with it
+    factor: every match contains it
+    """
+
+    @classmethod
+    def from_exact(cls, exact: str):
+        return cls(exact, exact, exact, exact)
+
+
+NOTHING = LiteralInfo(None, '', '', '')
+
+
+def longest(*strings):
+    return max(strings, key=len)
+
+
+def literal_info(node: BaseNode) -> LiteralInfo:
+    if isinstance(node, Char):
+        if isinstance(node.children[0], Token):
+            # ^ and $ match empty string
+            return LiteralInfo.from_exact('')
+        return LiteralInfo.from_exact(node.children[0])
+    elif isinstance(node, Empty):
+        return LiteralInfo.from_exact('')
+    elif isinstance(node, Bracket):
+        if (not node.complement and len(node.children) == 1
+                and isinstance(node.children[0], Char)):
+            return LiteralInfo.from_exact(node.children[0].children[0])
+        return NOTHING
+    elif isinstance(node, (Dot, Star, Question)):
+        return NOTHING
+    elif isinstance(node, Plus):
+        sub = literal_info(node.children[0])
+        return LiteralInfo(None, sub.prefix, sub.suffix, sub.factor)
+    elif isinstance(node, Group):
+        return literal_info(node.children[0])
+    elif isinstance(node, Repeat):
+        if node.min_count == 0:
+            return NOTHING
+        sub = literal_info(node.children[0])
+        if sub.exact is not None:
+            ans = LiteralInfo.from_exact(sub.exact * node.min_count)
+        else:
+            # prefix and suffix do not grow past the first and last copies
+            ans = cat_info(sub, sub) if node.min_count > 1 else sub
+        if node.max_count == node.min_count:
+            return ans
+        # the first and last min_count copies of every match
+        return LiteralInfo(None, ans.prefix, ans.suffix, ans.factor)
+    elif isinstance(node, Cat):
+        infos = list(map(literal_info, node.children))
+        ans = infos[0]
+        for info in infos[1:]:
+            ans = cat_info(ans, info)
+        return ans
+    elif isinstance(node, Or):
+        infos = list(map(literal_info, node.children))
+        exacts = set(info.exact for info in infos)
+        if len(exacts) == 1 and None not in exacts:
+            return infos[0]
+        prefix = os.path.commonprefix([ info.prefix for info in infos ])
+        suffix = os.path.commonprefix([ info.suffix[::-1] for info in infos ])[::-1]
+        return LiteralInfo(None, prefix, suffix, longest(prefix, suffix))
+    else:
+        assert not isinstance(node, CharRange)
+        raise NotImplementedError
+
+
+def cat_info(left: LiteralInfo, right: LiteralInfo) -> LiteralInfo:
+    if left.exact is not None and right.exact is not None:
+        return LiteralInfo.from_exact(left.exact + right.exact)
+
+    prefix = left.prefix if left.exact is None else left.exact + right.prefix
+    suffix = right.suffix if right.exact is None else left.suffix + right.exact
+    factor = longest(left.factor, right.factor, left.suffix + right.prefix, prefix, suffix)
+    return LiteralInfo(None, prefix, suffix, factor)
+
+
+class Prefilter:
+    """
+    Skip strings or regions that can not match with C speed substring search.
+
+    :ivar prefix: every match starts with it, may be empty
+    :ivar factor: every match contains it, may be empty
+    """
+
+    def __init__(self, prefix, factor):
+        self.prefix, self.factor = prefix, factor
+
+    def __repr__(self):
+        return '<{cls} prefix={prefix!r} factor={factor!r}>'.format(
+            cls=self.__class__.__name__, prefix=self.prefix, factor=self.factor,
+        )
+
+    def __bool__(self):
+        return bool(self.factor)
+
+    @classmethod
+    def from_ast(cls, node: BaseNode, *, encoding=None):
+        """
+        :param encoding: encode the literals for matching bytes-like objects
+        """
+        info = literal_info(node)
+        prefix, factor = info.prefix, info.factor
+        if encoding is not None:
+            prefix, factor = prefix.encode(encoding), factor.encode(encoding)
+        return cls(prefix, factor)
+
+    def may_match(self, string) -> bool:
+        """
+        Whether a match anywhere in string is possible, searches the whole string.
+        """
+        # memoryview has no find()
+        if not self.factor or not hasattr(string, 'find'):
+            return True
+        return string.find(self.factor) != -1
+
+    def may_match_begin(self, string) -> bool:
+        """
+        Whether a match at the beginning of string is possible, looks at
+        len(prefix) items only.
+        """
+        if not self.prefix:
+            return True
+        if hasattr(string, 'startswith'):
+            # raises TypeError for str vs bytes, like find()
+            return string.startswith(self.prefix)
+        return string[:len(self.prefix)] == self.prefix
@@ -1,41 +1,66 @@
-from regex.errors import ParseError, BadRange, UnexpectedToken, UnexpectedEOF
-from regex.tokenizer import Token, tokenize
-from regex.utils import BufferedGen, repr_range
+from regex.errors import ParseError, BadRange, IllegalEscape, UnexpectedToken, UnexpectedEOF
+from regex.tokenizer import Token, scan
+from regex.unicode import category_ranges, predefined_ranges
+from regex.utils import repr_range
 
 
-class TokenGen(BufferedGen):
-    def __init__(self, gen):
-        super().__init__(gen)
-        self.eof = False
+# same limit as old versions of re, bounds the size of the NFA
+MAX_REPEAT = 65535
+# nested repeats multiply, the whole pattern may expand no further than one maximal repeat
+MAX_EXPANDED_SIZE = MAX_REPEAT + 1
 
-    def get(self) -> Token:
-        if not self.eof:
-            ret = super().get()
-            if ret.type is Token.EOF:
-                self.eof = True
 
-        if self.eof:
-            return Token.EOF()
-        else:
-            return ret
+CAT_ENDS = frozenset((Token.EOF, Token.OR, Token.RPAR))
+REPEAT_TOKENS = frozenset((Token.STAR, Token.PLUS, Token.QUESTION, Token.REPEAT))
+
+
+class TokenList:
+    """
+    Cursor over the tokens from scan(), Token.EOF repeats at the end.
+    """
 
-    def eat(self, expect: Token=None):
+    __slots__ = ('tokens', 'pos', 'unicode', 'group_count', 'has_repeat')
+
+    def __init__(self, tokens, *, unicode=False):
+        """
+        :type tokens: list[Token]
+        :param unicode: whether \\w, \\d, \\s are unicode aware
+        """
+        self.tokens = tokens
+        self.pos = 0
+        self.unicode = unicode
+        self.group_count = 0
+        self.has_repeat = False
+
+    def peek(self) -> Token:
+        return self.tokens[self.pos]
+
+    def get(self) -> Token:
+        tok = self.tokens[self.pos]
+        if tok.type is not Token.EOF:
+            self.pos += 1
+        return tok
+
+    def eat(self, expect: Token):
         assert expect.type is not Token.EOF
         tok = self.get()
         if tok.type is Token.EOF:
             raise UnexpectedEOF(expect=expect)
-        if expect is not None and tok != expect:
+        if tok != expect:
             raise UnexpectedToken(got=tok, expect=expect)
 
 
-def parse_par(tokens: TokenGen):
+def parse_par(tokens: TokenList):
     tokens.eat(Token.LPAR())
+    # groups are numbered by their left parentheses
+    tokens.group_count += 1
+    index = tokens.group_count
     ret = parse_exp(tokens)
     tokens.eat(Token.RPAR())
-    return ret
+    return Group(ret, index)
 
 
-def parser_bracket(tokens: TokenGen):
+def parser_bracket(tokens: TokenList):
     tokens.eat(Token.LBRACKET())
     complement = tokens.peek().type is Token.NOT
     if complement:
@@ -71,50 +96,49 @@ def parser_bracket(tokens: TokenGen):
             assert len(tok.value) == 1
             ors.append(Char(tok.value))
         elif tok.type is tok.ESCAPE:
-            ors.append(lookup_escape(tok))
+            ors.append(lookup_escape(tok, unicode=tokens.unicode))
         else:
             raise NotImplementedError
 
 
-def parse_cat(tokens: TokenGen):
+def parse_cat(tokens: TokenList):
     cats = []
     while True:
         tok = tokens.peek()
-        if tok.type is Token.EOF:
-            break
-        elif tok.type in (Token.OR, Token.RPAR):
+        kind = tok.type
+        # most common first, peeked tokens other than EOF are consumed by pos += 1
+        if kind is Token.CHAR:
+            assert isinstance(tok.value, str) and len(tok.value) == 1
+            cats.append(Char(tok.value))
+            tokens.pos += 1
+        elif kind in CAT_ENDS:
             break
-        elif tok.type is Token.LPAR:
+        elif kind is Token.LPAR:
             cats.append(parse_par(tokens))
-        elif tok.type is Token.LBRACKET:
+        elif kind is Token.LBRACKET:
             cats.append(parser_bracket(tokens))
-        elif tok.type in (Token.STAR, Token.PLUS, Token.QUESTION):
+        elif kind in REPEAT_TOKENS:
             if not cats:
                 raise ParseError('nothing to repeat')
-            if isinstance(cats[-1], (Star, Plus, Question)):
+            if isinstance(cats[-1], (Star, Plus, Question, Repeat)):
                 raise ParseError('multiple repeat')
-            tok2node = {
-                Token.STAR: Star,
-                Token.PLUS: Plus,
-                Token.QUESTION: Question,
-            }
-            cats[-1] = tok2node[tok.type](cats[-1])
-            tokens.eat(tok)
-        elif tok.type is Token.DOT:
+            if kind is Token.REPEAT:
+                cats[-1] = Repeat(cats[-1], *tok.value)
+                tokens.has_repeat = True
+            else:
+                cats[-1] = REPEAT_NODES[kind](cats[-1])
+            tokens.pos += 1
+        elif kind is Token.ESCAPE:
+            cats.append(lookup_escape(tok, unicode=tokens.unicode))
+            tokens.pos += 1
+        elif kind is Token.DOT:
             cats.append(Dot())
-            tokens.eat(tok)
-        elif tok.type in (Token.BEGIN, Token.END):
+            tokens.pos += 1
+        elif kind is Token.BEGIN or kind is Token.END:
             cats.append(Char(tok))
-            tokens.eat(tok)
-        elif tok.type is Token.CHAR:
-            assert isinstance(tok.value, str) and len(tok.value) == 1
-            cats.append(Char(tok.value))
-            tokens.eat(tok)
-        elif tok.type is Token.ESCAPE:
-            cats.append(lookup_escape(tok))
-            tokens.eat(tok)
+            tokens.pos += 1
         else:
-            assert tok.type in (Token.RBRACKET, Token.NOT)
+            assert kind in (Token.RBRACKET, Token.NOT)
             assert not 'possible'
 
     if len(cats) == 0:
@@ -125,7 +149,7 @@ def parse_cat(tokens: TokenGen):
         return Cat(*cats)
 
 
-def parse_exp(tokens: TokenGen):
+def parse_exp(tokens: TokenList):
     ors = []
     while True:
         cat = parse_cat(tokens)
@@ -147,15 +171,18 @@ def parse_exp(tokens: TokenGen):
         return Or(*ors)
 
 
-def parse(tokens: TokenGen):
+def parse(tokens: TokenList):
     exp = parse_exp(tokens)
-    assert tokens.peek().type is Token.EOF
+    tok = tokens.peek()
+    if tok.type is not Token.EOF:
+        raise UnexpectedToken(got=tok, msg='unbalanced parenthesis')
+    if tokens.has_repeat and expanded_size(exp) > MAX_EXPANDED_SIZE:
+        raise ParseError('pattern too large after expanding repeats')
     return exp
 
 
-def ast_from_string(string):
-    tokens = TokenGen(tokenize(BufferedGen(iter(string))))
-    return parse(tokens)
+def ast_from_string(string, *, unicode=False):
+    return parse(TokenList(scan(string), unicode=unicode))
 
 
 class BaseNode:
@@ -215,7 +242,8 @@ class CharRange(BaseNode):
         self.start, self.end = start, end
 
     def __eq__(self, other):
-        return self.start, self.end == other.start, other.end
+        return (isinstance(other, CharRange)
+                and (self.start, self.end) == (other.start, other.end))
 
     def _node_label(self):
         return '{cls}: {range}'.format(
@@ -239,6 +267,27 @@ class Bracket(BaseNode):
         return super().__eq__(other) and self.complement is other.complement
 
 
+class RangeClass(Bracket):
+    """
+    Bracket of precomputed code point ranges, eg: ``\\p{Lu}``.
+    """
+
+    def __init__(self, name: str, ranges, *, complement: bool):
+        """
+        :type ranges: list[(int, int)]
+        """
+        super().__init__(complement=complement)
+        self.name = name
+        self.ranges = ranges
+
+    def _node_label(self):
+        return '{cls}: {name}'.format(cls=self.__class__.__name__, name=self.name)
+
+    def __eq__(self, other):
+        return (isinstance(other, RangeClass)
+                and self.name == other.name and self.complement is other.complement)
+
+
 class Dot(BaseNode):
     pass
 
@@ -255,6 +304,46 @@ class Question(BaseNode):
     pass
 
 
+class Group(BaseNode):
+    """
+    Capturing parentheses, index counts from 1.
+    """
+
+    def __init__(self, child: BaseNode, index: int):
+        super().__init__(child)
+        self.index = index
+
+    def _node_label(self):
+        return '{cls} {index}'.format(cls=self.__class__.__name__, index=self.index)
+
+    def __eq__(self, other):
+        return super().__eq__(other) and self.index == other.index
+
+
+class Repeat(BaseNode):
+    """
+    ``x{min_count,max_count}``, max_count is None if unbounded.
+    """
+
+    def __init__(self, child: BaseNode, min_count: int, max_count: int=None):
+        if max(min_count, max_count or 0) > MAX_REPEAT:
+            raise ParseError('repeat count too large')
+        if max_count is not None and max_count < min_count:
+            raise ParseError('min repeat greater than max repeat')
+        super().__init__(child)
+        self.min_count, self.max_count = min_count, max_count
+
+    def _node_label(self):
+        return '{cls}{{{min},{max}}}'.format(
+            cls=self.__class__.__name__, min=self.min_count,
+            max='' if self.max_count is None else self.max_count,
+        )
+
+    def __eq__(self, other):
+        return (super().__eq__(other)
+                and (self.min_count, self.max_count) == (other.min_count, other.max_count))
+
+
 class Cat(BaseNode):
     def _add_to_gv(self, graph, serial, parent_name=None, edge_opts=None):
         from regex.visualize import add_cat_node_to_gv
@@ -265,8 +354,64 @@ class Or(BaseNode):
     pass
 
 
-def lookup_escape(tok: Token) -> BaseNode:
-    if tok.value in PREDEFINED_RANGE:
+REPEAT_NODES = {
+    Token.STAR: Star,
+    Token.PLUS: Plus,
+    Token.QUESTION: Question,
+}
+
+
+def reverse_ast(node: BaseNode) -> BaseNode:
+    """
+    AST that matches the reversed strings, ``^`` and ``$`` are swapped.
+    """
+    if isinstance(node, Cat):
+        return Cat(*map(reverse_ast, reversed(node.children)))
+    elif isinstance(node, Char) and isinstance(node.children[0], Token):
+        tok = node.children[0]
+        return Char(Token.END() if tok.type is Token.BEGIN else Token.BEGIN())
+    elif isinstance(node, (Star, Plus, Question, Or)):
+        return node.__class__(*map(reverse_ast, node.children))
+    elif isinstance(node, Repeat):
+        return Repeat(reverse_ast(node.children[0]), node.min_count, node.max_count)
+    elif isinstance(node, Group):
+        return Group(reverse_ast(node.children[0]), node.index)
+    else:
+        assert isinstance(node, (Char, Bracket, Dot, Empty))
+        return node
+
+
+def expanded_size(node: BaseNode) -> int:
+    """
+    Number of character nodes once counted repeats are copied out, as ast_to_nfa does.
+    """
+    if isinstance(node, (Char, Bracket, Dot, Empty)):
+        return 1
+    elif isinstance(node, Repeat):
+        copies = node.max_count if node.max_count is not None else max(node.min_count, 1)
+        return copies * expanded_size(node.children[0])
+    else:
+        return sum(map(expanded_size, node.children))
+
+
+def lookup_escape(tok: Token, *, unicode=False) -> BaseNode:
+    """
+    :param unicode: use unicode tables for predefined ranges
+    """
+    if tok.value[0] in 'pP' and len(tok.value) > 1:
+        name = tok.value[2:-1]
+        try:
+            ranges = category_ranges(name)
+        except KeyError:
+            raise IllegalEscape('\\' + tok.value)
+        return RangeClass('\\' + tok.value, ranges, complement=tok.value[0] == 'P')
+    elif tok.value in PREDEFINED_RANGE:
+        if unicode:
+            letter = tok.value.lower()
+            return RangeClass(
+                '\\' + tok.value, predefined_ranges(letter),
+                complement=tok.value != letter,
+            )
         return PREDEFINED_RANGE[tok.value]
     elif tok.value in 'bB':
         raise NotImplementedError
@@ -274,12 +419,22 @@ def lookup_escape(tok: Token) -> BaseNode:
         assert not 'possible'
 
 
-# TODO: unicode mode
+def ascii_bracket(ranges: str, *, complement=False) -> Bracket:
+    """
+    :param ranges: pairs of start and end characters
+    """
+    children = []
+    for start, end in zip(ranges[::2], ranges[1::2]):
+        children.append(Char(start) if start == end else CharRange(start=start, end=end))
+    return Bracket(*children, complement=complement)
+
+
+# ascii mode, see regex.unicode for unicode mode
 PREDEFINED_RANGE = {
-    'w': ast_from_string('[a-zA-Z0-9_]'),
-    'W': ast_from_string('[^a-zA-Z0-9_]'),
-    's': ast_from_string('[ \\t\\n\\r\\f\\v]'),
-    'S': ast_from_string('[^ \\t\\n\\r\\f\\v]'),
-    'd': ast_from_string('[0-9]'),
-    'D': ast_from_string('[^0-9]'),
+    'w': ascii_bracket('azAZ09__'),
+    'W': ascii_bracket('azAZ09__', complement=True),
+    's': ascii_bracket('  \t\t\n\n\r\r\f\f\v\v'),
+    'S': ascii_bracket('  \t\t\n\n\r\r\f\f\v\v', complement=True),
+    'd': ascii_bracket('09'),
+    'D': ascii_bracket('09', complement=True),
 }
@@ -0,0 +1,214 @@
+"""
+Thompson simulation of the NFA, for patterns matched too few times to pay for
+building a DFA.
+
+All NFA states reachable at a position are advanced together, so matching costs
+O(NFA states) per character and compiling is linear to the pattern. Sets of NFA
+states are sparse sets over the dense numbering of the states, cleared in O(1)
+between steps, and the ε-closures are precomputed per NFA state.
+"""
+from bisect import bisect_right
+
+from regex.statemachine import NfaPair
+from regex.table import epsilon_closures, iter_bits, nfa_ranges
+from regex.tokenizer import Token
+
+
+def in_ranges(ranges, code: int) -> bool:
+    """
+    :param ranges: sorted starts and ends of code point ranges
+    """
+    starts, ends = ranges
+    k = bisect_right(starts, code) - 1
+    return k >= 0 and code <= ends[k]
+
+
+class SparseSet:
+    """
+    Set of ints in range(capacity), iterated in insertion order by dense[:size].
+    """
+
+    __slots__ = ('dense', 'sparse', 'size')
+
+    def __init__(self, capacity: int):
+        self.dense = [0] * capacity
+        self.sparse = [0] * capacity
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, i: int):
+        j = self.sparse[i]
+        return j < self.size and self.dense[j] == i
+
+    def __iter__(self):
+        return iter(self.dense[:self.size])
+
+    def clear(self):
+        self.size = 0
+
+    def add(self, i: int):
+        j = self.sparse[i]
+        if j >= self.size or self.dense[j] != i:
+            self.dense[self.size] = i
+            self.sparse[i] = self.size
+            self.size += 1
+
+    def update(self, items):
+        dense, sparse, size = self.dense, self.sparse, self.size
+        for i in items:
+            j = sparse[i]
+            if j >= size or dense[j] != i:
+                dense[size] = i
+                sparse[i] = size
+                size += 1
+        self.size = size
+
+
+class PikeVM:
+    """
+    Matcher with the interface of DfaTable used by Regex, over the characters of
+    the string instead of character classes.
+    """
+
+    def __init__(self, nfa_pair: NfaPair):
+        nfas = nfa_pair.states()
+        index = { nfa: i for i, nfa in enumerate(nfas) }
+        self.nfas = nfas
+        self.n_states = len(nfas)
+        self.end = index[nfa_pair.end]
+
+        self.chars = [None] * self.n_states
+        self.ranges = [None] * self.n_states
+        self.begin_tokens, self.end_tokens = set(), set()
+        keep = 1 << self.end      # states worth putting in a set
+        for i, nfa in enumerate(nfas):
+            if nfa.to is None:
+                continue
+            keep |= 1 << i
+            if isinstance(nfa.char, str):
+                self.chars[i] = nfa.char
+            elif isinstance(nfa.char, Token.BEGIN):
+                self.begin_tokens.add(i)
+            elif isinstance(nfa.char, Token.END):
+                self.end_tokens.add(i)
+            else:
+                ranges = nfa_ranges(nfa) or ()
+                self.ranges[i] = ([ start for start, _ in ranges ], [ end for _, end in ranges ])
+
+        # closures without the states that only have ε transitions
+        closures = epsilon_closures(nfas, index)
+        self.start_closure = list(iter_bits(closures[index[nfa_pair.start]] & keep))
+        self.to_closure = [
+            None if nfa.to is None else list(iter_bits(closures[index[nfa.to]] & keep))
+            for nfa in nfas
+        ]
+        self.match_empty = self.end in self.start_states(tokens=self.begin_tokens | self.end_tokens)
+
+    def start_states(self, tokens=()) -> SparseSet:
+        states = SparseSet(self.n_states)
+        states.update(self.start_closure)
+        return self.follow_tokens(states, tokens)
+
+    def follow_tokens(self, states: SparseSet, tokens) -> SparseSet:
+        """
+        Add the targets of the states in tokens, as if they were ε transitions.
+        """
+        if tokens:
+            k = 0
+            while k < states.size:     # grows while iterating
+                i = states.dense[k]
+                if i in tokens:
+                    states.update(self.to_closure[i])
+                k += 1
+        return states
+
+    def step(self, states: SparseSet, char: str, out: SparseSet):
+        """
+        Put the states following states on char to out.
+        """
+        out.clear()
+        chars, ranges, to_closure = self.chars, self.ranges, self.to_closure
+        code = None
+        for i in states.dense[:states.size]:
+            expect = chars[i]
+            if expect is not None:
+                if expect != char:
+                    continue
+            else:
+                charset = ranges[i]
+                if charset is None:
+                    continue
+                if code is None:
+                    code = ord(char)
+                starts, ends = charset
+                k = bisect_right(starts, code) - 1
+                if k < 0 or code > ends[k]:
+                    continue
+            out.update(to_closure[i])
+
+    def is_dollar_end(self, states: SparseSet) -> bool:
+        return self.end in self.follow_tokens(states, self.end_tokens)
+
+    def classify(self, string: str) -> str:
+        # characters are matched directly
+        return string
+
+    def is_char_start(self, string: str, pos: int) -> bool:
+        return True
+
+    def match_begin(self, string: str) -> int:
+        return self.longest_match(string)
+
+    def longest_match(self, string: str, pos=0) -> int:
+        """
+        End of the longest match starting at pos, -1 if none, same as
+        DfaTable.longest_match().
+        """
+        n = len(string)
+        if n == 0:
+            return 0 if self.match_empty else -1
+
+        states = self.start_states(tokens=self.begin_tokens if pos == 0 else ())
+        if pos == n:
+            return n if self.end in states or self.is_dollar_end(states) else -1
+
+        last_match = pos if self.end in states else -1
+        out = SparseSet(self.n_states)
+        for i in range(pos, n):
+            self.step(states, string[i], out)
+            if not out.size:
+                return last_match
+            states, out = out, states
+            if self.end in states:
+                last_match = i + 1
+
+        if last_match != n and self.is_dollar_end(states):
+            last_match = n
+        return last_match
+
+    def match_starts(self, string: str) -> bytearray:
+        """
+        Same as DfaTable.match_starts(), for the NFA of a reversed pattern.
+        """
+        n = len(string)
+        starts = bytearray(n + 1)
+        if n == 0:
+            starts[0] = self.match_empty
+            return starts
+
+        states = self.start_states(tokens=self.begin_tokens)
+        starts[n] = self.end in states
+        out = SparseSet(self.n_states)
+        for i in range(n - 1, -1, -1):
+            self.step(states, string[i], out)
+            if not out.size:
+                return starts
+            states, out = out, states
+            if self.end in states:
+                starts[i] = 1
+
+        if self.is_dollar_end(states):
+            starts[0] = 1
+        return starts
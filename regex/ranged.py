@@ -1,3 +1,5 @@
+from bisect import bisect_left
+from collections import namedtuple
 from functools import total_ordering
 from itertools import islice
 
@@ -147,6 +149,121 @@ class RangeSet(RangeMap):
 
     @classmethod
     def all(cls):
+        return cls.from_ranges([(MIN_CHAR, MAX_CHAR)])
+
+    @classmethod
+    def from_ranges(cls, ranges):
+        """
+        Build in linear time from ranges sorted by start, they may overlap or touch.
+
+        :type ranges: iterable[(str, str)]
+        """
+        merged = []     # [start, end] in code points
+        for start, end in ranges:
+            start, end = ord(start), ord(end)
+            if merged and start <= merged[-1][1] + 1:
+                assert start >= merged[-1][0], 'ranges are not sorted'
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+
+        def items():
+            prev_end = ord(MIN_CHAR) - 1
+            for start, end in merged:
+                if start > prev_end + 1:
+                    yield RangeMapItem(chr(prev_end + 1), chr(start - 1), cls.FALSE)
+                yield RangeMapItem(chr(start), chr(end), cls.TRUE)
+                prev_end = end
+            if prev_end < ord(MAX_CHAR):
+                yield RangeMapItem(chr(prev_end + 1), MAX_CHAR, cls.FALSE)
+
         rs = cls()
-        rs.add_range(MIN_CHAR, MAX_CHAR)
+        rs.sl = SkipList.from_sorted(items())
         return rs
+
+    def combine(self, other: 'RangeSet', op) -> 'RangeSet':
+        """
+        Merge the sorted ranges of two sets in one pass.
+
+        :param op: function of two bools, whether a char of the result is in the set
+        """
+        mine = [ (data.end, data.value == self.TRUE) for data in self.get_ranges() ]
+        others = [ (data.end, data.value == self.TRUE) for data in other.get_ranges() ]
+
+        ranges = []
+        start = MIN_CHAR
+        i = j = 0
+        # both lists end at MAX_CHAR
+        while i < len(mine):
+            end = min(mine[i][0], others[j][0])
+            if op(mine[i][1], others[j][1]):
+                ranges.append((start, end))
+            if mine[i][0] == end:
+                i += 1
+            if others[j][0] == end:
+                j += 1
+            if end != MAX_CHAR:
+                start = chr(ord(end) + 1)
+
+        return self.from_ranges(ranges)
+
+    def union(self, other: 'RangeSet') -> 'RangeSet':
+        return self.combine(other, lambda a, b: a or b)
+
+    def intersection(self, other: 'RangeSet') -> 'RangeSet':
+        return self.combine(other, lambda a, b: a and b)
+
+    def difference(self, other: 'RangeSet') -> 'RangeSet':
+        return self.combine(other, lambda a, b: a and not b)
+
+    def symmetric_difference(self, other: 'RangeSet') -> 'RangeSet':
+        return self.combine(other, lambda a, b: a != b)
+
+    def update(self, other: 'RangeSet'):
+        self.sl = self.union(other).sl
+
+
+RangeItem = namedtuple('RangeItem', ('start', 'end', 'value'))
+
+
+class ArrayRangeMap:
+    """
+    Read only RangeMap over parallel sorted arrays of range ends and values.
+
+    Lookups are a bisect over the ends, without allocating anything.
+    """
+
+    def __init__(self, ends, values):
+        """
+        :param ends: sorted ends of the ranges, the last one must be MAX_CHAR
+        :type ends: list[str]
+        :type values: list
+        """
+        assert ends and ends[-1] == MAX_CHAR
+        assert len(ends) == len(values)
+        self.ends = ends
+        self.values = values
+
+    @classmethod
+    def from_rangemap(cls, rm: RangeMap):
+        ends, values = [], []
+        for data in rm.get_ranges():
+            ends.append(data.end)
+            values.append(data.value)
+        return cls(ends, values)
+
+    def get_char(self, char: str):
+        return self.values[bisect_left(self.ends, char)]
+
+    def get_ranges(self):
+        start = MIN_CHAR
+        for end, value in zip(self.ends, self.values):
+            yield RangeItem(start, end, value)
+            start = chr(ord(end) + 1) if end != MAX_CHAR else None
+
+
+# backends of the maps in a compiled DfaState graph
+RANGEMAP_BACKENDS = {
+    'skiplist': lambda rm: rm,
+    'array': ArrayRangeMap.from_rangemap,
+}
@@ -0,0 +1,92 @@
+from regex.parser import ast_from_string
+from regex.statemachine import NfaState, NfaPair, ast_to_nfa
+from regex.table import DfaTable, SubsetConstruction, DEAD
+
+
+class RegexSet:
+    """
+    Match many patterns in one pass over the string.
+
+    The NFAs of all patterns are joined under one start state, and every DFA
+    state records which patterns have reached their end state.
+    """
+
+    def __init__(self, patterns, *, unicode=False):
+        """
+        :type patterns: list[str]
+        :param unicode: see compile()
+        :raise ValueError: no patterns
+        """
+        self.patterns = tuple(patterns)
+        if not self.patterns:
+            raise ValueError('RegexSet needs at least one pattern')
+
+        start, end = NfaState(), NfaState()
+        end_to_index = dict()
+        for i, pattern in enumerate(self.patterns):
+            sub_start, sub_end = ast_to_nfa(ast_from_string(pattern, unicode=unicode))
+            start.epsilon.append(sub_start)
+            sub_end.epsilon.append(end)
+            end_to_index[sub_end] = i
+
+        sc = SubsetConstruction(NfaPair(start, end))
+        self.table, subsets = DfaTable.from_subset_construction(sc)
+
+        end_bits = [ (1 << sc.index[nfa], i) for nfa, i in end_to_index.items() ]
+
+        def indexes(states):
+            return tuple(sorted(i for bit, i in end_bits if states & bit))
+
+        # patterns matched in each state, and those only matched at the end of string
+        self.accepts = [ indexes(states) for states in subsets ]
+        self.dollar_accepts = [
+            tuple(sorted(set(indexes(sc.follow_tokens(states, sc.end_token_mask))) - set(accepts)))
+            for states, accepts in zip(subsets, self.accepts)
+        ]
+        self.empty_accepts = indexes(
+            sc.follow_tokens(subsets[0], sc.begin_mask | sc.end_token_mask))
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def match_begin(self, string: str):
+        """
+        :return: result of Regex.match_begin() for every pattern
+        :rtype: list[int]
+        """
+        ans = [-1] * len(self.patterns)
+        if string == '':
+            for i in self.empty_accepts:
+                ans[i] = 0
+            return ans
+
+        table, accepts = self.table, self.accepts
+        trans, size = table.trans, table.alphabet.size
+        state = 0
+        for i in accepts[state]:
+            ans[i] = 0
+
+        for pos, class_id in enumerate(table.classify(string), 1):
+            state = trans[state * size + class_id]
+            if state == DEAD:
+                return ans
+            for i in accepts[state]:
+                ans[i] = pos
+
+        for i in self.dollar_accepts[state]:
+            ans[i] = len(string)
+        return ans
+
+    def matches(self, string: str):
+        """
+        :return: indexes of patterns matching a prefix of string
+        :rtype: list[int]
+        """
+        return [ i for i, end in enumerate(self.match_begin(string)) if end >= 0 ]
+
+    def match_full(self, string: str):
+        """
+        :return: indexes of patterns matching the whole string
+        :rtype: list[int]
+        """
+        return [ i for i, end in enumerate(self.match_begin(string)) if end == len(string) ]
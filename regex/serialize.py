@@ -0,0 +1,149 @@
+"""
+Flat binary format of compiled DFAs.
+
+Layout, all offsets aligned to 4 bytes::
+
+    file header     FILE_HEADER, then pattern, prefilter prefix and factor
+    tables          TABLE_HEADER, then the arrays of each table:
+                    bounds, classes (uint32), trans (int32), is_end, is_dollar_end (uint8)
+
+Arrays are in native byte order, loading casts memoryviews over the buffer
+instead of copying them, so a mmap of a dumped file can be matched directly.
+"""
+from array import array
+from collections import namedtuple
+import struct
+import sys
+
+from regex.alphabet import Alphabet, MIN_CP
+from regex.table import DfaTable, DEAD
+from regex.utf8 import ByteTable, BYTE_CLASSES
+
+
+MAGIC = b'RXDF'
+VERSION = 1
+
+# magic, version, flags, number of tables, length of pattern, prefix, factor
+FILE_HEADER = struct.Struct('<4sBBHIII')
+# number of states, alphabet size, number of bounds, inner_start, match_empty
+TABLE_HEADER = struct.Struct('<IIIiB3x')
+
+FLAG_UTF8 = 1
+FLAG_UNICODE = 2
+FLAG_BIG_ENDIAN = 4
+FLAG_CODEGEN = 8
+
+Loaded = namedtuple(
+    'Loaded', ('pattern', 'tables', 'prefix', 'factor', 'utf8', 'unicode', 'codegen'),
+)
+
+
+def padding(length: int) -> bytes:
+    return b'\0' * (-length % 4)
+
+
+def dump(pattern: str, tables, prefix, factor, *, utf8=False, unicode=False,
+         codegen=False) -> bytes:
+    """
+    :type tables: list[DfaTable]
+    :param prefix: prefilter prefix, bytes if utf8
+    :param factor: prefilter factor, bytes if utf8
+    :param codegen: generate code of the first table after loading
+    """
+    flags = (FLAG_UTF8 if utf8 else 0) | (FLAG_UNICODE if unicode else 0)
+    if codegen:
+        flags |= FLAG_CODEGEN
+    if sys.byteorder == 'big':
+        flags |= FLAG_BIG_ENDIAN
+
+    if not utf8:
+        prefix, factor = prefix.encode('utf-8'), factor.encode('utf-8')
+    strings = (pattern.encode('utf-8'), prefix, factor)
+    parts = [FILE_HEADER.pack(MAGIC, VERSION, flags, len(tables), *map(len, strings))]
+    parts.extend(strings)
+    parts.append(padding(sum(map(len, strings))))
+
+    for table in tables:
+        alphabet = table.alphabet
+        parts.append(TABLE_HEADER.pack(
+            len(table), alphabet.size, len(alphabet.bounds), table.inner_start,
+            table.match_empty,
+        ))
+        parts.append(array('I', alphabet.bounds).tobytes())
+        parts.append(array('I', alphabet.classes).tobytes())
+        parts.append(array('i', table.trans).tobytes())
+        flags = bytes(map(bool, table.is_end)) + bytes(map(bool, table.is_dollar_end))
+        parts.append(flags)
+        parts.append(padding(len(flags)))
+
+    return b''.join(parts)
+
+
+def load(buffer) -> Loaded:
+    """
+    :param buffer: bytes-like object from dump(), eg: bytes or mmap
+    :raise ValueError: not a dumped DFA, or truncated or corrupt
+    """
+    view = memoryview(buffer).cast('B')
+    offset = 0
+
+    def take_bytes(length: int, what: str):
+        nonlocal offset
+        end = offset + length
+        if end > len(view):
+            raise ValueError('truncated {}'.format(what))
+        ans = view[offset:end]
+        offset = end
+        return ans
+
+    def take(length: int, fmt: str):
+        itemsize = struct.calcsize(fmt)
+        return take_bytes(length * itemsize, 'table').cast(fmt)
+
+    magic, version, flags, n_tables, *lengths = \
+        FILE_HEADER.unpack(take_bytes(FILE_HEADER.size, 'header'))
+    if magic != MAGIC:
+        raise ValueError('bad magic: {!r}'.format(magic))
+    if version != VERSION:
+        raise ValueError('unsupported version: {}'.format(version))
+    if bool(flags & FLAG_BIG_ENDIAN) != (sys.byteorder == 'big'):
+        raise ValueError('dumped with a different byte order')
+    if n_tables == 0:
+        raise ValueError('no table')
+    utf8, unicode = bool(flags & FLAG_UTF8), bool(flags & FLAG_UNICODE)
+    codegen = bool(flags & FLAG_CODEGEN)
+
+    # UnicodeDecodeError is a ValueError
+    pattern, prefix, factor = [ bytes(take_bytes(length, 'strings')) for length in lengths ]
+    take_bytes(-offset % 4, 'strings')
+    pattern = pattern.decode('utf-8')
+    if not utf8:
+        prefix, factor = prefix.decode('utf-8'), factor.decode('utf-8')
+
+    table_cls = ByteTable if utf8 else DfaTable
+    tables = []
+    for _ in range(n_tables):
+        n_states, size, n_bounds, inner_start, match_empty = \
+            TABLE_HEADER.unpack(take_bytes(TABLE_HEADER.size, 'table header'))
+        bounds, classes = take(n_bounds, 'I'), take(n_bounds, 'I')
+        if n_bounds == 0 or bounds[0] != MIN_CP or max(classes) + 1 != size:
+            raise ValueError('corrupt alphabet')
+        if utf8 and size != BYTE_CLASSES:
+            raise ValueError('corrupt alphabet')
+        # inner_start is DEAD for a minimized DFA anchored by ^
+        if n_states == 0 or not DEAD <= inner_start < n_states:
+            raise ValueError('corrupt table header')
+        trans = take(n_states * size, 'i')
+        if min(trans) < DEAD or max(trans) >= n_states:
+            raise ValueError('transition out of range')
+        is_end = take(n_states, 'B')
+        is_dollar_end = take(n_states, 'B')
+        take_bytes(-offset % 4, 'table')
+        tables.append(table_cls(
+            Alphabet(bounds, classes), trans, is_end, is_dollar_end, bool(match_empty),
+            inner_start=inner_start,
+        ))
+
+    if offset != len(view):
+        raise ValueError('trailing data')
+    return Loaded(pattern, tables, prefix, factor, utf8, unicode, codegen)
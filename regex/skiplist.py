@@ -69,6 +69,23 @@ class SkipList:
         assert 0 < prob < 1
         self.prob = prob
 
+    @classmethod
+    def from_sorted(cls, iterable, *, prob=0.5):
+        """
+        Build from sorted data in linear time, without searching for each insertion.
+        """
+        sl = cls(prob=prob)
+        last = [sl.head]    # last node of each level
+        for data in iterable:
+            node = SLNode(data, height=sl_height(prob))
+            while len(last) < len(node.tower):
+                sl.head.tower.append(None)
+                last.append(sl.head)
+            for i in range(len(node.tower)):
+                last[i].tower[i] = node
+                last[i] = node
+        return sl
+
     def node_iter(self):
         cur = self.head
         while cur.tower[0] is not None:
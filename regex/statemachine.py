@@ -2,23 +2,41 @@ from collections import namedtuple
 from itertools import chain
 
 from regex.parser import (
-    BaseNode, Char, Bracket, CharRange, Dot,
-    Star, Plus, Question, Cat, Or, Empty,
+    BaseNode, Char, Bracket, CharRange, RangeClass, Dot,
+    Star, Plus, Question, Repeat, Group, Cat, Or, Empty,
 )
 from regex.tokenizer import Token
-from regex.ranged import RangeSet, RangeMap
+from regex.ranged import RangeSet, RangeMap, RANGEMAP_BACKENDS
 
 
 class NfaState:
-    def __init__(self, *, char=None, charset: RangeSet=None, to=None, epsilon=None):
+    # many thousands of these are created for big patterns
+    __slots__ = ('char', 'charset', 'to', 'epsilon', 'tag', '_label')
+
+    def __init__(self, *, char=None, charset: RangeSet=None, to=None, epsilon=None,
+                 tag: int=None):
         # combinations:
         # char, to
         # charset, to
         self.char = char
         self.charset = charset
         self.to = to
-        self.epsilon = epsilon or set()
-        self.label = 'S_{:x}'.format(id(self))
+        self.epsilon = epsilon or []    # type: list[NfaState]
+        # capture slot the position is recorded to when passing this state,
+        # only used for extracting groups, an ε state for everything else
+        self.tag = tag
+        self._label = None
+
+    @property
+    def label(self):
+        # only needed for visualization and debugging
+        if self._label is None:
+            self._label = 'S_{:x}'.format(id(self))
+        return self._label
+
+    @label.setter
+    def label(self, value):
+        self._label = value
 
     def __repr__(self):
         return '<{}>'.format(self.label)
@@ -35,6 +53,25 @@ class NfaPair(namedtuple('NfaPair', ('start', 'end'))):
     def to_dfa(self):
         return DfaState.from_nfa(self)
 
+    def states(self):
+        """
+        All states reachable from start, in depth first order.
+
+        :rtype: list[NfaState]
+        """
+        seen = {self.start}
+        ans = []
+        stack = [self.start]
+        while stack:
+            nfa = stack.pop()
+            ans.append(nfa)
+            for child in chain(nfa.epsilon, (nfa.to,)):
+                if child is not None and child not in seen:
+                    seen.add(child)
+                    stack.append(child)
+
+        return ans
+
 
 def ε_closure(nfas, extra=None):
     """
@@ -42,43 +79,107 @@ def ε_closure(nfas, extra=None):
     :type extra: set
     """
     extra = extra or set()
-
-    def get_epsilons(nfa: NfaState):
-        yield from nfa.epsilon
-        if nfa.char in extra:
-            yield nfa.to
-
     ans = set(nfas)
-    delta = ans
-    while True:
-        delta = { d for d in chain.from_iterable(get_epsilons(x) for x in delta)
-                  if d not in ans }
-        if delta:
-            ans.update(delta)
-        else:
-            return ans
+    stack = list(ans)
+    while stack:
+        nfa = stack.pop()
+        for to in nfa.epsilon:
+            if to not in ans:
+                ans.add(to)
+                stack.append(to)
+        if nfa.char in extra and nfa.to not in ans:
+            ans.add(nfa.to)
+            stack.append(nfa.to)
+    return ans
 
 
 def merge_bracket_ranges(node: Bracket) -> RangeSet:
-    rs = RangeSet()
+    if isinstance(node, RangeClass):
+        # already sorted and merged
+        rs = RangeSet.from_ranges((chr(start), chr(end)) for start, end in node.ranges)
+        if node.complement:
+            rs.complement()
+        return rs
+
+    ranges = []
     for child in node.children:
         if isinstance(child, Char):
-            rs.add_char(child.children[0])
+            ranges.append((child.children[0], child.children[0]))
         elif isinstance(child, CharRange):
-            rs.add_range(child.start, child.end)
+            ranges.append((child.start, child.end))
         elif isinstance(child, Bracket):
-            # TODO: RangeSet.update()
             subrs = merge_bracket_ranges(child)
-            for r in subrs.get_true_ranges():
-                rs.add_range(r.start, r.end)
+            ranges.extend((r.start, r.end) for r in subrs.get_true_ranges())
         else:
             assert not 'possible'
 
+    ranges.sort()
+    rs = RangeSet.from_ranges(ranges)
     if node.complement:
         rs.complement()
     return rs
 
 
+def copy_nfa(nfa_pair: NfaPair) -> NfaPair:
+    """
+    Copy the states of nfa_pair, charsets are shared and not copied.
+    """
+    old_states = nfa_pair.states()
+    if nfa_pair.end not in old_states:
+        old_states.append(nfa_pair.end)
+    new = { nfa: NfaState(char=nfa.char, charset=nfa.charset, tag=nfa.tag) for nfa in old_states }
+    for nfa in old_states:
+        copied = new[nfa]
+        if nfa.to is not None:
+            copied.to = new[nfa.to]
+        copied.epsilon = [ new[to] for to in nfa.epsilon ]
+    return NfaPair(new[nfa_pair.start], new[nfa_pair.end])
+
+
+def repeat_to_nfa(node: Repeat) -> NfaPair:
+    """
+    The sub NFA is built once and copied. Optional copies are nested like
+    ``(x(x(x)?)?)?``, so the ε-closure of a state holds one optional copy and
+    not all of the following ones as in ``x?x?x?``.
+    """
+    min_count, max_count = node.min_count, node.max_count
+    if max_count is None:
+        # x{m,} is x{m-1}x+, x{0,} is x*
+        n_copies = max(min_count, 1)
+    else:
+        n_copies = max_count
+    if n_copies == 0:
+        end = NfaState()
+        return NfaPair(end, end)
+
+    sub = ast_to_nfa(node.children[0])
+    # copy before sub is linked to anything
+    copies = [ copy_nfa(sub) for _ in range(n_copies - 1) ]
+    copies.append(sub)
+
+    start = end = NfaState()
+    if max_count is None:
+        for sub_start, sub_end in copies:
+            end.epsilon.append(sub_start)
+            end = sub_end
+        if sub_start not in sub_end.epsilon:
+            sub_end.epsilon.append(sub_start)
+        if min_count == 0 and sub_end not in sub_start.epsilon:
+            sub_start.epsilon.append(sub_end)
+        return NfaPair(start, end)
+
+    for sub_start, sub_end in copies[:min_count]:
+        end.epsilon.append(sub_start)
+        end = sub_end
+    final = NfaState()
+    for sub_start, sub_end in copies[min_count:]:
+        end.epsilon.append(final)
+        end.epsilon.append(sub_start)
+        end = sub_end
+    end.epsilon.append(final)
+    return NfaPair(start, final)
+
+
 def ast_to_nfa(node: BaseNode) -> NfaPair:
     if isinstance(node, Char):
         end = NfaState()
@@ -98,20 +199,36 @@ def ast_to_nfa(node: BaseNode) -> NfaPair:
         return NfaPair(start, end)
     elif isinstance(node, Star):
         sub_start, sub_end = ast_to_nfa(node.children[0])
-        sub_start.epsilon.add(sub_end)
-        sub_end.epsilon.add(sub_start)
+        # avoid duplicate edges when repeats are nested
+        if sub_end not in sub_start.epsilon:
+            sub_start.epsilon.append(sub_end)
+        if sub_start not in sub_end.epsilon:
+            sub_end.epsilon.append(sub_start)
 
         return NfaPair(sub_start, sub_end)
     elif isinstance(node, Plus):
         sub_start, sub_end = ast_to_nfa(node.children[0])
-        sub_end.epsilon.add(sub_start)
+        if sub_start not in sub_end.epsilon:
+            sub_end.epsilon.append(sub_start)
 
         return NfaPair(sub_start, sub_end)
     elif isinstance(node, Question):
         sub_start, sub_end = ast_to_nfa(node.children[0])
-        sub_start.epsilon.add(sub_end)
+        if sub_end not in sub_start.epsilon:
+            sub_start.epsilon.append(sub_end)
 
         return NfaPair(sub_start, sub_end)
+    elif isinstance(node, Repeat):
+        return repeat_to_nfa(node)
+    elif isinstance(node, Group):
+        sub_start, sub_end = ast_to_nfa(node.children[0])
+        # untagged ends, the ε edges skipping an optional group must not pass the tags
+        end = NfaState()
+        close = NfaState(tag=2 * node.index - 1, epsilon=[end])
+        start = NfaState(epsilon=[NfaState(tag=2 * node.index - 2, epsilon=[sub_start])])
+        sub_end.epsilon.append(close)
+
+        return NfaPair(start, end)
     elif isinstance(node, Cat):
         assert len(node.children) > 0
         start = None
@@ -120,7 +237,7 @@ def ast_to_nfa(node: BaseNode) -> NfaPair:
             if start is None:
                 start = s
             if prev_e is not None:
-                prev_e.epsilon.add(s)
+                prev_e.epsilon.append(s)
             prev_e = e
 
         return NfaPair(start, e)
@@ -129,8 +246,8 @@ def ast_to_nfa(node: BaseNode) -> NfaPair:
         start = NfaState()
         end = NfaState()
         for s, e in map(ast_to_nfa, node.children):
-            start.epsilon.add(s)
-            e.epsilon.add(end)
+            start.epsilon.append(s)
+            e.epsilon.append(end)
 
         return NfaPair(start, end)
     elif isinstance(node, Empty):
@@ -163,7 +280,13 @@ class DfaState:
         return dfa_to_gv(self)
 
     @classmethod
-    def from_nfa(cls, nfa_pair: NfaPair):
+    def from_nfa(cls, nfa_pair: NfaPair, *, rangemap_backend='skiplist'):
+        """
+        :param rangemap_backend: a key of RANGEMAP_BACKENDS, the rangemaps are
+                                 converted to it after construction; this graph is
+                                 not used by compile(), which matches with DfaTable
+        """
+        freeze_rangemap = RANGEMAP_BACKENDS[rangemap_backend]
         start, end = nfa_pair
         set_to_state = dict()
         start_dfa = None
@@ -206,6 +329,8 @@ class DfaState:
                     q.append(nfas)
 
         assert start_dfa.match_empty is not None
+        for dfa_state in set_to_state.values():
+            dfa_state.rangemap = freeze_rangemap(dfa_state.rangemap)
         return start_dfa
 
     def follow(self, char):
@@ -0,0 +1,64 @@
+from regex.table import DfaTable, DEAD, UNKNOWN
+
+
+class StreamMatcher:
+    """
+    Longest match at the beginning of a string that is fed in chunks.
+
+    Only the current DFA state and the end of the last match are kept between
+    chunks, finish() gives the same result as Regex.match_begin() on the whole
+    string.
+    """
+
+    def __init__(self, table: DfaTable):
+        self.table = table
+        self.state_key = table.state_key(0)
+        self.offset = 0     # number of characters fed
+        self.last_match = 0 if table.is_end[0] else -1
+        self.dead = False
+
+    @property
+    def done(self) -> bool:
+        """
+        Whether feeding more chunks can not change the result.
+        """
+        return self.dead
+
+    def feed(self, chunk: str):
+        if self.dead or not chunk:
+            return
+
+        table = self.table
+        trans, is_end, size = table.trans, table.is_end, table.alphabet.size
+        state = table.state_from_key(self.state_key)
+        last_match = self.last_match
+
+        for i, class_id in enumerate(table.classify(chunk), self.offset + 1):
+            to = trans[state * size + class_id]
+            if to < 0:
+                if to == UNKNOWN:
+                    to = table.explore(state, class_id)
+                if to == DEAD:
+                    self.dead = True
+                    break
+            state = to
+            if is_end[state]:
+                last_match = i
+
+        self.state_key = table.state_key(state)
+        self.offset += len(chunk)
+        self.last_match = last_match
+
+    def finish(self) -> int:
+        """
+        :return: length of the longest matching prefix, -1 if none
+        """
+        table = self.table
+        if self.offset == 0:
+            # see DfaTable.longest_match
+            return 0 if table.match_empty else -1
+        if not self.dead:
+            state = table.state_from_key(self.state_key)
+            if not table.is_end[state] and table.is_dollar_end[state]:
+                return self.offset
+        return self.last_match
@@ -0,0 +1,595 @@
+from array import array
+import sys
+import time
+
+from regex.alphabet import Alphabet
+from regex.errors import BudgetExceeded
+from regex.statemachine import NfaState, NfaPair
+from regex.tokenizer import Token
+
+
+DEAD = -1
+UNKNOWN = -2    # transition not computed yet, only in lazy tables
+
+# bytes of a DFA state besides its row and bitmask: list and dict entries
+STATE_OVERHEAD = 120
+
+
+def nfa_ranges(nfa: NfaState):
+    """
+    Code point ranges accepted by the transition of nfa, None if it has no transition.
+    """
+    if nfa.char is not None:
+        # nfa.char may be Token.BEGIN or Token.END
+        if isinstance(nfa.char, str):
+            return ((ord(nfa.char), ord(nfa.char)),)
+    elif nfa.charset is not None:
+        return tuple((ord(r.start), ord(r.end)) for r in nfa.charset.get_true_ranges())
+    return None
+
+
+def iter_bits(mask: int):
+    """
+    Indexes of the set bits of mask, from the lowest.
+    """
+    if not mask:
+        return
+    # scanning the binary string is linear, clearing bits one by one on a big int is not,
+    # the string starts at the lowest set bit, masks of few nearby states are short
+    low = (mask & -mask).bit_length() - 1
+    digits = bin(mask >> low)[:1:-1]
+    i = digits.find('1')
+    while i >= 0:
+        yield i + low
+        i = digits.find('1', i + 1)
+
+
+def epsilon_closures(nfas, index):
+    """
+    ε-closure of every NFA state as a bitmask.
+
+    The strongly connected components of the ε graph share a closure, Tarjan's
+    algorithm finds them children first, so closures are built bottom up.
+
+    :param nfas: NFA states numbered densely
+    :param index: dict of NFA state to its number
+    :rtype: list[int]
+    """
+    edges = [ [ index[to] for to in nfa.epsilon ] for nfa in nfas ]
+    n = len(edges)
+    closures = [0] * n
+    order = [-1] * n
+    lowlink = [0] * n
+    on_stack = [False] * n
+    stack = []
+    counter = 0
+
+    for root in range(n):
+        if order[root] >= 0:
+            continue
+        work = [(root, 0)]
+        while work:
+            v, child = work.pop()
+            if child == 0:
+                order[v] = lowlink[v] = counter
+                counter += 1
+                stack.append(v)
+                on_stack[v] = True
+            else:
+                # returned from edges[v][child - 1]
+                w = edges[v][child - 1]
+                lowlink[v] = min(lowlink[v], lowlink[w])
+
+            while child < len(edges[v]):
+                w = edges[v][child]
+                child += 1
+                if order[w] < 0:
+                    work.append((v, child))
+                    work.append((w, 0))
+                    break
+                elif on_stack[w]:
+                    lowlink[v] = min(lowlink[v], order[w])
+            else:
+                if lowlink[v] == order[v]:
+                    # v is the root of a component
+                    members = []
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        members.append(w)
+                        if w == v:
+                            break
+                    mask = 0
+                    for w in members:
+                        mask |= 1 << w
+                        for x in edges[w]:
+                            if not on_stack[x]:
+                                # finished component or this one
+                                mask |= closures[x]
+                    for w in members:
+                        closures[w] = mask
+
+    return closures
+
+
+class SubsetConstruction:
+    """
+    Character classes of an NFA and the steps of subset construction over them.
+
+    NFA states are numbered densely, DFA states are represented by int bitmasks
+    of NFA states. ε-closures are precomputed per NFA state, so the closure of a
+    set is the bitwise or of the closures of its members.
+    """
+
+    def __init__(self, nfa_pair: NfaPair):
+        self.start, self.end = nfa_pair
+        self.nfas = nfa_pair.states()
+        self.index = { nfa: i for i, nfa in enumerate(self.nfas) }
+
+        # one global pass over all transitions to find the character classes
+        nfa_to_ranges = dict()
+        for nfa in self.nfas:
+            ranges = nfa_ranges(nfa)
+            if ranges:
+                nfa_to_ranges[nfa] = ranges
+        self.alphabet = Alphabet.from_range_lists(nfa_to_ranges.values())
+
+        self.closures = self.epsilon_closures()
+        # closure of the target of each NFA state with a transition
+        self.to_closure = [
+            0 if nfa.to is None else self.closures[self.index[nfa.to]] for nfa in self.nfas
+        ]
+
+        # NFA states with a transition on each class, and the classes of each state
+        ranges_to_classes = dict()
+        self.class_sources = [0] * self.alphabet.size
+        self.classes_of = [()] * len(self.nfas)
+        for nfa, ranges in nfa_to_ranges.items():
+            if ranges not in ranges_to_classes:
+                ranges_to_classes[ranges] = self.alphabet.classes_of(ranges)
+            i = self.index[nfa]
+            self.classes_of[i] = ranges_to_classes[ranges]
+            for class_id in self.classes_of[i]:
+                self.class_sources[class_id] |= 1 << i
+        self.has_transition = 0
+        for mask in self.class_sources:
+            self.has_transition |= mask
+
+        self.begin_mask = self.token_mask(Token.BEGIN)
+        self.end_token_mask = self.token_mask(Token.END)
+        self.end_bit = 1 << self.index[self.end]
+
+    def token_mask(self, token_type) -> int:
+        """
+        NFA states whose transition is on a Token of token_type.
+        """
+        mask = 0
+        for i, nfa in enumerate(self.nfas):
+            if isinstance(nfa.char, token_type):
+                mask |= 1 << i
+        return mask
+
+    def epsilon_closures(self):
+        """
+        :rtype: list[int]
+        """
+        return epsilon_closures(self.nfas, self.index)
+
+    def closure(self, mask: int, tokens: int=0) -> int:
+        """
+        ε-closure of mask, transitions of the NFA states in tokens are also followed.
+
+        :param tokens: bitmask of NFA states, eg: begin_mask
+        """
+        ans = 0
+        for i in iter_bits(mask):
+            ans |= self.closures[i]
+        return self.follow_tokens(ans, tokens)
+
+    def follow_tokens(self, closed: int, tokens: int) -> int:
+        """
+        Like closure(), for a mask that is already ε-closed.
+        """
+        followed = 0
+        while True:
+            pending = closed & tokens & ~followed
+            if not pending:
+                return closed
+            followed |= pending
+            for i in iter_bits(pending):
+                closed |= self.to_closure[i]
+
+    def nfas_of(self, mask: int):
+        """
+        :rtype: list[NfaState]
+        """
+        return [ self.nfas[i] for i in iter_bits(mask) ]
+
+    def start_states(self, at_begin=True) -> int:
+        """
+        :param at_begin: whether matching starts at the beginning of the string
+        """
+        tokens = self.begin_mask if at_begin else 0
+        return self.closure(1 << self.index[self.start], tokens)
+
+    def moves(self, states: int):
+        """
+        :return: dict of class id to next states, dead transitions are omitted
+        """
+        ans = dict()
+        classes_of, to_closure = self.classes_of, self.to_closure
+        for i in iter_bits(states & self.has_transition):
+            to = to_closure[i]
+            for class_id in classes_of[i]:
+                ans[class_id] = ans.get(class_id, 0) | to
+        return ans
+
+    def move(self, states: int, class_id: int) -> int:
+        ans = 0
+        to_closure = self.to_closure
+        for i in iter_bits(states & self.class_sources[class_id]):
+            ans |= to_closure[i]
+        return ans
+
+    def is_end(self, states: int) -> bool:
+        return bool(states & self.end_bit)
+
+    def is_dollar_end(self, states: int) -> bool:
+        return bool(self.follow_tokens(states, self.end_token_mask) & self.end_bit)
+
+    def match_empty(self, start_states: int) -> bool:
+        # special case for matching empty string
+        # both Token.BEGIN and Token.END should be considered epsilon
+        tokens = self.begin_mask | self.end_token_mask
+        return bool(self.follow_tokens(start_states, tokens) & self.end_bit)
+
+
+class Budget:
+    """
+    Limits of subset construction, None is unlimited.
+
+    Memory is estimated from the transition rows and the bitmasks of NFA states,
+    not measured.
+    """
+
+    def __init__(self, *, max_states: int=None, max_memory: int=None,
+                 max_seconds: float=None):
+        """
+        :param max_states: number of DFA states
+        :param max_memory: bytes
+        :param max_seconds: wall time from the start of compiling
+        """
+        self.max_states = max_states
+        self.max_memory = max_memory
+        self.max_seconds = max_seconds
+
+    def __repr__(self):
+        return '{cls}(max_states={s.max_states}, max_memory={s.max_memory}, ' \
+               'max_seconds={s.max_seconds})'.format(cls=self.__class__.__name__, s=self)
+
+    def check(self, n_states: int, memory: int, started: float):
+        """
+        :param started: time.monotonic() at the start
+        :raise BudgetExceeded:
+        """
+        if self.max_states is not None and n_states > self.max_states:
+            raise BudgetExceeded('max_states', n_states)
+        if self.max_memory is not None and memory > self.max_memory:
+            raise BudgetExceeded('max_memory', memory)
+        if self.max_seconds is not None:
+            elapsed = time.monotonic() - started
+            if elapsed > self.max_seconds:
+                raise BudgetExceeded('max_seconds', elapsed)
+
+    def cache_states(self, max_states: int, state_memory: int) -> int:
+        """
+        Number of states a lazy DFA may cache within max_states and max_memory,
+        at least 3.
+
+        :param state_memory: estimated bytes per state
+        """
+        if self.max_states is not None:
+            max_states = min(max_states, self.max_states)
+        if self.max_memory is not None:
+            max_states = min(max_states, self.max_memory // state_memory)
+        return max(max_states, 3)
+
+
+class DfaTable:
+    """
+    Frozen, integer indexed DFA over character classes.
+
+    State 0 is the start state at the beginning of the string, ``inner_start``
+    is the start state anywhere else, where ``^`` can not match. The transition
+    of state ``s`` on class ``c`` is ``trans[s * len(alphabet) + c]``, which is
+    a state id or ``DEAD``.
+    """
+
+    def __init__(self, alphabet: Alphabet, trans, is_end, is_dollar_end, match_empty,
+                 inner_start=0):
+        """
+        :type trans: list[int]
+        :type is_end: list[bool]
+        :type is_dollar_end: list[bool]
+        :type match_empty: bool
+        :type inner_start: int
+        """
+        self.alphabet = alphabet
+        self.trans = trans
+        self.is_end = is_end
+        self.is_dollar_end = is_dollar_end
+        self.match_empty = match_empty
+        self.inner_start = inner_start
+
+    def __len__(self):
+        return len(self.is_end)
+
+    @classmethod
+    def from_nfa(cls, nfa_pair: NfaPair, *, budget: Budget=None, started: float=None):
+        """
+        :param started: time.monotonic() when compiling started, defaults to now
+        """
+        if started is None:
+            started = time.monotonic()
+        sc = SubsetConstruction(nfa_pair)
+        table, _ = cls.from_subset_construction(sc, budget=budget, started=started)
+        return table
+
+    @classmethod
+    def from_subset_construction(cls, sc: SubsetConstruction, *, budget: Budget=None,
+                                 started: float=None):
+        """
+        :param started: time.monotonic() when compiling started, defaults to now
+        :return: the table, and the bitmask of NFA states of each DFA state
+        :raise BudgetExceeded: only if budget is given
+        """
+        if started is None:
+            started = time.monotonic()
+        memory = 0
+        if budget is not None:
+            # the ε-closures grow quadratically with the NFA, before any DFA state
+            memory = sum(map(sys.getsizeof, sc.closures)) + STATE_OVERHEAD * len(sc.nfas)
+            budget.check(0, memory, started)
+        start_states = sc.start_states()
+        set_to_id = {start_states: 0}
+        order = [start_states]
+        inner_states = sc.start_states(at_begin=False)
+        if inner_states not in set_to_id:
+            set_to_id[inner_states] = len(order)
+            order.append(inner_states)
+        trans = []
+        for states in order:    # order grows while iterating
+            row = [DEAD] * sc.alphabet.size
+            for class_id, next_states in sc.moves(states).items():
+                if next_states not in set_to_id:
+                    set_to_id[next_states] = len(order)
+                    order.append(next_states)
+                row[class_id] = set_to_id[next_states]
+            trans.extend(row)
+            if budget is not None:
+                memory += sys.getsizeof(states) + 8 * len(row) + STATE_OVERHEAD
+                budget.check(len(order), memory, started)
+
+        table = cls(
+            sc.alphabet, trans,
+            is_end=[ sc.is_end(states) for states in order ],
+            is_dollar_end=[ sc.is_dollar_end(states) for states in order ],
+            match_empty=sc.match_empty(start_states),
+            inner_start=set_to_id[inner_states],
+        )
+        return table, order
+
+    def minimize(self) -> 'DfaTable':
+        """
+        Merge equivalent states with Hopcroft's algorithm.
+
+        States are distinguished by is_end and is_dollar_end, match_empty belongs
+        to the start state and is kept as is. States that can never reach an
+        accepting state are merged into DEAD.
+        """
+        size = self.alphabet.size
+        sink = len(self)    # explicit dead state to make the DFA complete
+
+        # inverse transitions: inv[class_id][to] -> sources
+        inv = [ dict() for _ in range(size) ]
+        for i, to in enumerate(self.trans):
+            state, class_id = divmod(i, size)
+            to = sink if to == DEAD else to
+            inv[class_id].setdefault(to, []).append(state)
+        for class_id in range(size):
+            inv[class_id].setdefault(sink, []).append(sink)
+
+        # initial partition by acceptance
+        flags_to_block = dict()
+        blocks = []
+        block_of = []
+        for state in range(sink + 1):
+            if state == sink:
+                flags = (False, False)
+            else:
+                flags = (self.is_end[state], self.is_dollar_end[state])
+            if flags not in flags_to_block:
+                flags_to_block[flags] = len(blocks)
+                blocks.append(set())
+            block_id = flags_to_block[flags]
+            blocks[block_id].add(state)
+            block_of.append(block_id)
+
+        pending = set(range(len(blocks)))
+        while pending:
+            splitter = list(blocks[pending.pop()])
+            for class_id in range(size):
+                # states that move into splitter on class_id, grouped by block
+                touched = dict()
+                for to in splitter:
+                    for state in inv[class_id].get(to, ()):
+                        touched.setdefault(block_of[state], set()).add(state)
+
+                for block_id, inside in touched.items():
+                    block = blocks[block_id]
+                    if len(inside) == len(block):
+                        continue
+
+                    # split block, the smaller half gets a new id
+                    new_id = len(blocks)
+                    if len(inside) <= len(block) - len(inside):
+                        block -= inside
+                        new_block = inside
+                    else:
+                        new_block = block - inside
+                        blocks[block_id] = inside
+                    blocks.append(new_block)
+                    for state in new_block:
+                        block_of[state] = new_id
+
+                    # if block_id is already pending both halves are now pending,
+                    # otherwise processing the smaller half is enough
+                    pending.add(new_id)
+
+        # renumber blocks in breadth first order from the start states
+        dead_block = block_of[sink]
+        block_to_id = {block_of[0]: 0}
+        order = [block_of[0]]
+        inner_block = block_of[self.inner_start]
+        if inner_block != dead_block and inner_block not in block_to_id:
+            block_to_id[inner_block] = len(order)
+            order.append(inner_block)
+        trans = []
+        for block_id in order:  # order grows while iterating
+            state = next(iter(blocks[block_id]))
+            for to in self.trans[state * size:(state + 1) * size]:
+                to_block = block_of[sink if to == DEAD else to]
+                if to_block == dead_block:
+                    trans.append(DEAD)
+                    continue
+                if to_block not in block_to_id:
+                    block_to_id[to_block] = len(order)
+                    order.append(to_block)
+                trans.append(block_to_id[to_block])
+
+        representatives = [ next(iter(blocks[block_id])) for block_id in order ]
+        return self.__class__(
+            self.alphabet, trans,
+            is_end=[ self.is_end[state] for state in representatives ],
+            is_dollar_end=[ self.is_dollar_end[state] for state in representatives ],
+            match_empty=self.match_empty,
+            inner_start=block_to_id.get(inner_block, DEAD),
+        )
+
+    def explore(self, state: int, class_id: int) -> int:
+        raise NotImplementedError('transitions of {} are all known'.format(self))
+
+    def state_key(self, state: int):
+        """
+        Identifier of state that stays valid across matches, see state_from_key().
+        """
+        return state
+
+    def state_from_key(self, key) -> int:
+        return key
+
+    def follow(self, state: int, char: str) -> int:
+        class_id = self.alphabet.class_of(char)
+        to = self.trans[state * self.alphabet.size + class_id]
+        if to == UNKNOWN:
+            to = self.explore(state, class_id)
+        return to
+
+    def classify(self, string: str):
+        """
+        Class ids of the characters of string, as bytes or array of ints.
+        """
+        classes = self.alphabet.classify(string)
+        if isinstance(classes, list):
+            classes = array('I', classes)
+        return classes
+
+    def is_char_start(self, classes, pos: int) -> bool:
+        """
+        Whether pos is at a character boundary, matches never start elsewhere.
+        """
+        return True
+
+    def match_begin(self, string: str) -> int:
+        return self.longest_match(self.classify(string))
+
+    def longest_match(self, classes, pos=0) -> int:
+        """
+        End of the longest match starting at pos, -1 if none.
+
+        :param classes: result of classify()
+        """
+        n = len(classes)
+        is_end = self.is_end
+        state = 0 if pos == 0 else self.inner_start
+        if state == DEAD:
+            return -1
+
+        if pos == n:
+            if pos == 0:
+                # empty string is a special case, must be determined be DfaState.match_empy
+                # eg: test case "$^" matches ""
+                return 0 if self.match_empty else -1
+            else:
+                return n if is_end[state] or self.is_dollar_end[state] else -1
+
+        if pos != 0:
+            # O(1) slicing without copying
+            classes = memoryview(classes)[pos:]
+
+        trans, size = self.trans, self.alphabet.size
+        if is_end[state]:
+            # can match zero length prefix
+            last_match = pos
+        else:
+            # -1 on no matching prefix
+            last_match = -1
+
+        for i, class_id in enumerate(classes, pos + 1):
+            to = trans[state * size + class_id]
+            if to < 0:
+                if to == UNKNOWN:
+                    to = self.explore(state, class_id)
+                if to == DEAD:
+                    return last_match
+            state = to
+            if is_end[state]:
+                last_match = i
+
+        if not is_end[state] and self.is_dollar_end[state]:
+            last_match = n
+
+        return last_match
+
+    def match_starts(self, classes) -> bytearray:
+        """
+        Scan backward over the whole string with the DFA of the reversed pattern,
+        and mark every position some match starts at.
+
+        :param classes: result of classify()
+        :return: flags for positions 0..len(classes)
+        """
+        n = len(classes)
+        starts = bytearray(n + 1)
+        if n == 0:
+            starts[0] = self.match_empty
+            return starts
+
+        trans, is_end, size = self.trans, self.is_end, self.alphabet.size
+        state = 0
+        starts[n] = is_end[state]
+        for i in range(n - 1, -1, -1):
+            class_id = classes[i]
+            to = trans[state * size + class_id]
+            if to < 0:
+                if to == UNKNOWN:
+                    to = self.explore(state, class_id)
+                if to == DEAD:
+                    return starts
+            state = to
+            if is_end[state]:
+                starts[i] = 1
+
+        if self.is_dollar_end[state]:
+            starts[0] = 1
+        return starts
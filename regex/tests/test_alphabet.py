@@ -0,0 +1,60 @@
+from regex.alphabet import Alphabet, MAX_CP, BMP_SIZE
+from regex.parser import ast_from_string
+from regex.statemachine import ast_to_nfa
+from regex.table import DfaTable
+
+
+def test_alphabet_from_range_lists():
+    alphabet = Alphabet.from_range_lists([
+        [(ord('a'), ord('c'))],
+        [(ord('b'), ord('b'))],
+    ])
+    assert list(alphabet.intervals()) == [
+        (0, ord('a') - 1, 0),
+        (ord('a'), ord('a'), 1),
+        (ord('b'), ord('b'), 2),
+        (ord('c'), ord('c'), 1),
+        (ord('d'), MAX_CP, 0),
+    ]
+    assert len(alphabet) == 3
+    assert alphabet.classes_of([(ord('a'), ord('c'))]) == {1, 2}
+    assert alphabet.ranges_of(1) == [(ord('a'), ord('a')), (ord('c'), ord('c'))]
+
+
+def test_alphabet_empty():
+    alphabet = Alphabet.from_range_lists([])
+    assert len(alphabet) == 1
+    assert list(alphabet.classify('ab\U0001f600')) == [0, 0, 0]
+
+
+def test_alphabet_classify():
+    alphabet = Alphabet.from_range_lists([
+        [(ord('0'), ord('9'))],
+        [(0x10000, MAX_CP)],
+    ])
+    string = 'a1　\U0001f600'
+    expected = [ alphabet.class_of(ch) for ch in string ]
+    assert list(alphabet.classify(string)) == expected
+    assert list(alphabet.classify('a1')) == expected[:2]
+
+
+def test_alphabet_translate_table():
+    ranges = [[(ord('0'), ord('9'))], [(0x10000, MAX_CP)]]
+    table = Alphabet.from_range_lists(ranges).translate_table
+    assert isinstance(table, bytes) and len(table) == BMP_SIZE
+    # identical partitions share the table
+    assert Alphabet.from_range_lists(ranges).translate_table is table
+
+    # class ids over 255 need two bytes per entry
+    alphabet = Alphabet.from_range_lists([ [(cp, cp)] for cp in range(0, 600, 2) ])
+    assert alphabet.size > 256
+    assert alphabet.translate_table.itemsize == 2
+    string = ''.join(map(chr, range(700)))
+    assert list(alphabet.classify(string)) == [ alphabet.class_of(ch) for ch in string ]
+
+
+def test_alphabet_complement_classes():
+    # the two ranges outside of [^a] are the same class
+    for pattern, size in (('[^a]', 2), ('.', 1), (r'\W', 2), ('[^a]|.', 2), ('[^ab]c', 3)):
+        table = DfaTable.from_nfa(ast_to_nfa(ast_from_string(pattern)))
+        assert len(table.alphabet) == size
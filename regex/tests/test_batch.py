@@ -0,0 +1,61 @@
+from itertools import count, islice
+
+import pytest
+
+from regex.api import *
+
+
+STRINGS = ('', 'a1', 'abc123x', '9', 'zz', 'é') * 50
+
+
+def test_match_many_in_process():
+    reg = compile('[a-z]+[0-9]*')
+    assert list(reg.match_many(STRINGS, workers=0)) == [ reg.match_begin(s) for s in STRINGS ]
+
+
+def test_match_many_workers():
+    for backend in ('dfa', 'codegen'):
+        reg = compile('[a-z]+[0-9]*', backend=backend)
+        results = reg.match_many(iter(STRINGS), workers=2, chunksize=7)
+        assert list(results) == [ reg.match_begin(s) for s in STRINGS ]
+
+    reg = compile('é+', utf8=True)
+    data = [ s.encode('utf-8') for s in STRINGS ]
+    assert list(reg.match_many(data, workers=2, chunksize=16)) \
+        == [ reg.match_begin(b) for b in data ]
+
+
+def test_match_many_lazy_input():
+    reg = compile('1+')
+    results = reg.match_many(map(str, count()), workers=2, chunksize=3)
+    assert list(islice(results, 12)) == [-1, 1, -1, -1, -1, -1, -1, -1, -1, -1, 1, 2]
+    results.close()
+
+
+def test_match_many_errors():
+    # raised by the call, not when iterating
+    with pytest.raises(ValueError):
+        compile('a').match_many(['a'], workers=2, chunksize=0)
+    with pytest.raises(ValueError):
+        compile('a').match_many(['a'], workers=-1)
+    for reg in (compile('a', backend='lazy'), compile('a', backend='pike'),
+                compile('.*a' + '.' * 12, budget=Budget(max_states=100))):
+        with pytest.raises(ValueError):
+            reg.match_many(['a'], workers=2)
+        assert list(reg.match_many(['a' * 13], workers=0)) == [reg.match_begin('a' * 13)]
+
+
+def test_match_many_bad_dump():
+    # raised in this process instead of hanging in the pool initializer
+    reg = compile('a')
+    reg.dump = lambda: b'garbage'
+    with pytest.raises(ValueError):
+        reg.match_many(['a'], workers=2)
+    reg = compile('^a', minimize=True)
+    assert list(reg.match_many(['a', 'b'], workers=2)) == [1, -1]
+
+
+def test_dump_codegen():
+    loaded = load(compile('ab*', backend='codegen').dump())
+    assert loaded.backend == 'codegen'
+    assert loaded.match_begin('abbc') == 3
@@ -0,0 +1,93 @@
+import pytest
+
+from regex.api import compile, Budget
+from regex.errors import BudgetExceeded
+from regex.lazy import LazyDfa
+from regex.parser import ast_from_string
+from regex.statemachine import ast_to_nfa
+from regex.table import DfaTable
+from regex.utf8 import BytePikeVM
+
+
+EXPLOSION = '.*a' + '.' * 12
+
+
+def test_budget_table():
+    nfa = ast_to_nfa(ast_from_string(EXPLOSION))
+    for budget, limit in (
+            (Budget(max_states=100), 'max_states'),
+            (Budget(max_memory=10000), 'max_memory'),
+            (Budget(max_seconds=0), 'max_seconds')):
+        with pytest.raises(BudgetExceeded) as info:
+            DfaTable.from_nfa(nfa, budget=budget)
+        assert info.value.limit == limit
+
+    table = DfaTable.from_nfa(nfa, budget=Budget(max_states=10000, max_memory=10 ** 8))
+    assert len(table) == 2 ** 13
+
+
+def test_budget_fallback():
+    reg = compile(EXPLOSION, budget=Budget(max_states=100))
+    assert reg.backend == 'lazy'
+    assert reg.fallback.limit == 'max_states'
+    assert reg.match_begin('xxa0123456789ab') == 15
+    assert reg.match_begin('xxxxxxxxxxxxxx') == -1
+    string = 'a' * 13 + 'b' * 20 + 'a' * 3
+    assert reg.findall(string) == compile(EXPLOSION).findall(string) == [string[:25]]
+
+    for backend in ('dfa', 'codegen'):
+        reg = compile('ab*c', backend=backend, minimize=True, budget=Budget(max_states=100))
+        assert reg.backend == backend
+        assert reg.fallback is None
+        assert reg.match_begin('abbbc') == 5
+
+
+def test_budget_reverse_table():
+    # the forward DFA is small, the reverse one explodes
+    reg = compile('.' * 12 + 'a', budget=Budget(max_states=100))
+    assert reg.backend == 'dfa'
+    assert reg.findall('0123456789abad0123456789aa') == ['0123456789aba', 'd0123456789aa']
+    assert isinstance(reg.reverse_table, LazyDfa)
+    reg.dump()
+    with pytest.raises(ValueError):
+        reg.dump(reverse=True)
+
+    reg = compile('.' * 12 + 'a', utf8=True, budget=Budget(max_states=1000))
+    assert reg.backend == 'dfa'
+    assert reg.findall(b'0123456789abad0123456789aa') == [b'0123456789aba', b'd0123456789aa']
+    assert isinstance(reg.reverse_table, BytePikeVM)
+    with pytest.raises(ValueError):
+        reg.dump(reverse=True)
+
+
+def test_budget_before_subset_construction():
+    # the NFA alone is over budget, no DFA state is built
+    reg = compile('[ab]{1000}', budget=Budget(max_memory=1000))
+    assert reg.fallback.limit == 'max_memory'
+    assert reg.fallback.value > 1000
+    reg = compile('[ab]{1000}', budget=Budget(max_seconds=0))
+    assert reg.fallback.limit == 'max_seconds'
+    assert reg.match_full('ab' * 500)
+
+
+def test_budget_fallback_cache():
+    reg = compile(EXPLOSION, max_states=1000, budget=Budget(max_states=100))
+    assert reg.table.max_states == 100
+    reg = compile(EXPLOSION, max_states=1000, budget=Budget(max_memory=10000))
+    assert 3 <= reg.table.max_states < 100
+    reg = compile(EXPLOSION, max_states=1000, budget=Budget(max_seconds=0))
+    assert reg.table.max_states == 1000
+
+
+def test_budget_utf8():
+    reg = compile(EXPLOSION, utf8=True, budget=Budget(max_states=100))
+    assert reg.backend == 'pike'
+    assert reg.fallback.limit == 'max_states'
+    dfa = compile(EXPLOSION, utf8=True)
+    string = 'b' + 'a' + 'é' * 12 + 'xaé'
+    data = string.encode('utf-8')
+    assert reg.match_begin(data) == dfa.match_begin(data) == 26
+    assert reg.match_begin(b'x' * 14) == -1
+    assert reg.findall(data) == dfa.findall(data) == [data[:26]]
+    with pytest.raises(TypeError):
+        reg.match_begin(string)
@@ -0,0 +1,74 @@
+import threading
+
+import regex.api
+from regex.api import *
+
+
+def setup_function(function):
+    purge()
+
+
+def teardown_function(function):
+    set_cache_size(regex.api.DEFAULT_CACHE_SIZE)
+    purge()
+
+
+def test_cache_hit_miss():
+    assert cache_info() == (0, 0, regex.api.DEFAULT_CACHE_SIZE, 0)
+    assert match_begin('a+', 'aab') == 2
+    assert match_full('a+', 'aa')
+    assert match_begin('b', 'b') == 1
+    assert cache_info() == (1, 2, regex.api.DEFAULT_CACHE_SIZE, 2)
+
+    purge()
+    assert cache_info() == (0, 0, regex.api.DEFAULT_CACHE_SIZE, 0)
+
+
+def test_cache_lru():
+    set_cache_size(2)
+    match_begin('a', '')
+    match_begin('b', '')
+    match_begin('a', '')    # 'b' is now least recently used
+    match_begin('c', '')
+    assert cache_info().currsize == 2
+
+    match_begin('a', '')
+    assert cache_info().hits == 2
+    match_begin('b', '')
+    assert cache_info().misses == 4
+
+
+def test_cache_resize():
+    for pattern in 'abcd':
+        match_begin(pattern, '')
+    set_cache_size(1)
+    assert cache_info().currsize == 1
+
+    set_cache_size(0)
+    match_begin('x', 'x')
+    match_begin('x', 'x')
+    assert cache_info() == (0, 6, 0, 0)
+
+
+def test_cache_threads():
+    # evictions by other threads must not break hits
+    set_cache_size(2)
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(300):
+                pattern = 'ab'[(i + n) % 2] + 'xyz'[i % 3]
+                assert match_begin(pattern, pattern) == 2
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [ threading.Thread(target=worker, args=(n,)) for n in range(8) ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    info = cache_info()
+    assert info.hits + info.misses == 8 * 300
+    assert info.currsize <= 2
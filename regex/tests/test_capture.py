@@ -0,0 +1,55 @@
+import re
+
+import pytest
+
+from regex.api import compile, search
+from regex.capture import count_groups
+from regex.parser import ast_from_string
+
+
+# patterns where re picks the same submatches, re differs on empty iterations
+# like '(a*)*b', which are never taken here
+PATTERNS = (
+    r'(\w+)@(\w+)\.com', '(a|ab)(c|bcd)(d*)', '(a*)(a*)', '(a)|(b)', '((a)|b)+',
+    '(a{2})+', 'x(y)?z', 'x(y)*z', 'x(y){0,2}z', '(^a)(b$)', '()', '(a|b)*(b)',
+)
+STRINGS = ('', 'b', 'ab', 'abcd', 'aaa', 'xz', 'xyyz', 'abab', 'mail bob@example.com x')
+
+
+def test_count_groups():
+    assert count_groups(ast_from_string('a')) == 0
+    assert count_groups(ast_from_string('(a)(b(c))|(d)*')) == 4
+    assert compile('(a)((b)c)').groups == 3
+
+
+def test_captures_same_as_re():
+    for pattern in PATTERNS:
+        reg = compile(pattern)
+        for string in STRINGS:
+            m, expect = reg.search(string), re.search(pattern, string)
+            assert (m is None) == (expect is None), (pattern, string)
+            if m is not None and m.span() == expect.span():
+                assert m.groups() == expect.groups(), (pattern, string)
+                assert [ m.span(i) for i in range(reg.groups + 1) ] \
+                    == [ expect.span(i) for i in range(reg.groups + 1) ], (pattern, string)
+
+
+def test_match_groups():
+    m = search(r'(\d+)-(\d+)|(x)', 'tel 12-345')
+    assert m.group() == m.group(0) == '12-345'
+    assert m.group(1, 2, 3) == ('12', '345', None)
+    assert m.groups() == ('12', '345', None)
+    assert m.groups(default='') == ('12', '345', '')
+    assert (m.start(2), m.end(2), m.span(3)) == (7, 10, (-1, -1))
+    with pytest.raises(IndexError):
+        m.group(4)
+
+
+def test_captures_backends():
+    for kwargs in (dict(backend='lazy'), dict(backend='pike'), dict(minimize=True)):
+        m = compile('([a-z]+)=([0-9]*)', **kwargs).search('  key=12 ')
+        assert m.groups() == ('key', '12'), kwargs
+
+    m = compile('(é+)(b)', utf8=True).search('xéébb'.encode('utf-8'))
+    assert m.span(1) == (1, 5)
+    assert m.groups() == ('éé'.encode('utf-8'), b'b')
@@ -0,0 +1,49 @@
+import pytest
+
+from regex.api import *
+from regex.codegen import CodeTable, MAX_CODEGEN_STATES, condition
+from regex.tests.test_table import PATTERNS, STRINGS, table_from_string
+from regex.tests.test_search import PATTERNS as SEARCH_PATTERNS, STRINGS as SEARCH_STRINGS
+
+
+def test_codegen_same_as_dfa():
+    patterns = PATTERNS + SEARCH_PATTERNS + ('[^a]', '[abcdefgh]+', '.*\U0001f600', 'a(b|$)|^c')
+    for pattern in patterns:
+        for minimize in (False, True):
+            reg = compile(pattern)
+            code_reg = compile(pattern, backend='codegen', minimize=minimize)
+            assert code_reg.backend == 'codegen'
+            for string in STRINGS + SEARCH_STRINGS + ('\U0001f600', 'cb', 'ddd'):
+                assert code_reg.match_begin(string) == reg.match_begin(string), (pattern, string)
+                assert code_reg.findall(string) == reg.findall(string), (pattern, string)
+
+
+def test_codegen_source():
+    table = CodeTable.from_table(table_from_string('[a-z]+[0-9]'))
+    assert 'def match_begin(string):' in table.source
+    # the self loop of [a-z]+
+    assert table.source.count('for i, c in it:') == 2
+    # states are bisected instead of tested one by one
+    source = CodeTable.from_table(table_from_string('.*a..')).source
+    assert '    for i, c in it:\n        if state < 4:\n            if state < 2:\n' in source
+
+
+def test_codegen_condition():
+    constants = dict()
+    assert condition([3], constants) == 'c == 3'
+    assert condition([1, 4], constants) == 'c == 1 or c == 4'
+    assert condition([2, 3, 4, 5], constants) == '2 <= c <= 5'
+    assert condition([1, 3, 5, 7, 9], constants) == 'c in CLASSES_0'
+    assert constants == dict(CLASSES_0=frozenset([1, 3, 5, 7, 9]))
+
+
+def test_codegen_too_many_states():
+    table = compile('.*a....').table
+    assert len(table) > MAX_CODEGEN_STATES
+    with pytest.raises(ValueError):
+        CodeTable.from_table(table)
+    # compile() matches with the table instead
+    reg = compile('.*a....', backend='codegen')
+    assert reg.backend == 'dfa'
+    assert reg.match_begin('xxabcdeyy') == 7
+    assert len(compile('.*a...').table) <= MAX_CODEGEN_STATES
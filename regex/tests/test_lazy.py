@@ -0,0 +1,46 @@
+import pytest
+
+from regex.api import compile
+from regex.lazy import LazyDfa
+from regex.parser import ast_from_string
+from regex.statemachine import ast_to_nfa
+from regex.tests.test_table import PATTERNS, STRINGS, table_from_string
+
+
+def lazy_from_string(string, **kwargs):
+    return LazyDfa(ast_to_nfa(ast_from_string(string)), **kwargs)
+
+
+def test_lazy_same_as_table():
+    for pattern in PATTERNS:
+        table = table_from_string(pattern)
+        lazy = lazy_from_string(pattern)
+        assert len(lazy) <= 2
+        for string in STRINGS:
+            assert lazy.match_begin(string) == table.match_begin(string), (pattern, string)
+        assert len(lazy) <= len(table)
+
+
+def test_lazy_flush():
+    pattern = '(a|b)*a(a|b)(a|b)(a|b)'
+    table = table_from_string(pattern)
+    lazy = lazy_from_string(pattern, max_states=3)
+    for string in ('abababbbaaab', 'aaaa', 'bbbbbbbbb', 'abbb' * 10):
+        assert lazy.match_begin(string) == table.match_begin(string)
+        assert len(lazy) <= 3
+    assert lazy.flush_count > 0
+
+
+def test_lazy_explosion_pattern():
+    reg = compile('.*a.........', backend='lazy')
+    assert reg.backend == 'lazy'
+    assert reg.match_begin('xxa0123456789') == 12
+    assert reg.match_begin('xxxxxxxxxxxxxx') == -1
+    assert len(reg.table) < 100
+
+
+def test_lazy_minimize():
+    with pytest.raises(ValueError):
+        lazy_from_string('ab*').minimize()
+    with pytest.raises(ValueError):
+        compile('ab*', backend='lazy', minimize=True)
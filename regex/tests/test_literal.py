@@ -0,0 +1,93 @@
+import pytest
+
+from regex.api import Regex, compile
+from regex.literal import literal_info, Prefilter
+from regex.parser import ast_from_string
+
+
+def info_from_string(string):
+    return literal_info(ast_from_string(string))
+
+
+def test_literal_info():
+    info = info_from_string('ERROR: [0-9]+')
+    assert info.exact is None
+    assert info.prefix == 'ERROR: '
+    assert info.factor == 'ERROR: '
+
+    assert info_from_string('abc').exact == 'abc'
+    assert info_from_string('^a[b]c$').exact == 'abc'
+    assert info_from_string('a*').prefix == ''
+
+    info = info_from_string('.*foo(bar)+x?')
+    assert (info.prefix, info.suffix, info.factor) == ('', '', 'foobar')
+
+    info = info_from_string('(abcx|abdx)y')
+    assert (info.prefix, info.suffix, info.factor) == ('ab', 'xy', 'ab')
+
+    info = info_from_string('x|x')
+    assert info.exact == 'x'
+
+
+def test_literal_info_repeat():
+    assert info_from_string('ab{3}').exact == 'abbb'
+    info = info_from_string('(ab){2,5}c')
+    assert (info.exact, info.prefix, info.factor) == (None, 'abab', 'ababc')
+    info = info_from_string('(a[0-9]){3}')
+    assert (info.prefix, info.suffix) == ('a', '')
+    assert info_from_string('x{0,2}y').prefix == ''
+
+
+def test_prefilter():
+    prefilter = Prefilter.from_ast(ast_from_string('[a-z]+_suffix'))
+    assert prefilter
+    assert prefilter.prefix == ''
+    assert not prefilter.may_match('abc_suffi')
+    assert prefilter.may_match('abc_suffix')
+
+    prefilter = Prefilter.from_ast(ast_from_string('ab.'))
+    assert prefilter.may_match_begin('abc')
+    assert not prefilter.may_match_begin('xabc')
+    assert not prefilter.may_match_begin('a')
+
+    prefilter = Prefilter.from_ast(ast_from_string('é+'), encoding='utf-8')
+    assert prefilter.prefix == 'é'.encode('utf-8')
+    assert prefilter.may_match(memoryview(b'xyz'))
+    assert prefilter.may_match_begin(memoryview('éa'.encode('utf-8')))
+    assert not prefilter.may_match_begin(memoryview(b'xyz'))
+
+    assert not Prefilter.from_ast(ast_from_string('a*|b'))
+
+
+def test_prefilter_search():
+    patterns = ('ERROR: [0-9]+', 'ab|ac', '^ab', 'ab$', 'a(b|c)*d', '(ab)+', 'x?abc', 'b+ab')
+    strings = ('', 'ab', 'ERROR: 12 ERROR: x ERROR: 3', 'abacad', 'xabababc', 'abcbd ad', 'bbbab')
+    for pattern in patterns:
+        regex = compile(pattern)
+        assert regex.prefilter
+        unfiltered = Regex(pattern, regex.table)
+        for string in strings:
+            assert regex.match_begin(string) == unfiltered.match_begin(string), (pattern, string)
+            assert regex.findall(string) == unfiltered.findall(string), (pattern, string)
+
+
+def test_prefilter_bytes():
+    regex = compile('é+', utf8=True)
+    data = 'xéé yé'.encode('utf-8')
+    spans = [ m.span() for m in regex.finditer(data) ]
+    assert spans == [ m.span() for m in regex.finditer(memoryview(data)) ]
+    assert spans == [(1, 5), (7, 9)]
+
+
+class NoFind(str):
+    def find(self, *args):
+        raise AssertionError('searched the whole string')
+
+
+def test_prefilter_match_begin_bounded():
+    regex = compile('ab[0-9]+_suffix')
+    assert regex.prefilter.factor == '_suffix'
+    assert regex.match_begin(NoFind('x' + 'ab1_suffix' * 1000)) == -1
+    assert regex.match_begin(NoFind('ab12_suffix')) == 11
+    with pytest.raises(AssertionError):
+        regex.search(NoFind('ab1_suffix'))
@@ -12,7 +12,7 @@ def test_paser_basic():
             Char('a'),
             Char('b'),
             Star(
-                Or(Char('a'), Empty(), Char('b'), Empty())
+                Group(Or(Char('a'), Empty(), Char('b'), Empty()), 1)
             )
         ),
         Cat(
@@ -31,6 +31,35 @@ def test_parser_repeat():
     )
 
 
+def test_parser_counted_repeat():
+    ast = ast_from_string('a{2}b{1,}c{,3}d{2,5}e{,}')
+    assert ast == Cat(
+        Repeat(Char('a'), 2, 2),
+        Repeat(Char('b'), 1, None),
+        Repeat(Char('c'), 0, 3),
+        Repeat(Char('d'), 2, 5),
+        Repeat(Char('e'), 0, None),
+    )
+    assert ast_from_string('(ab){3}') == Repeat(Group(Cat(Char('a'), Char('b')), 1), 3, 3)
+    # not a repeat, braces are literal like in re
+    for string in ('a{}', 'a{x}', 'a{1', 'a{1,2,3}', 'a{ 1}'):
+        assert ast_from_string(string) == Cat(*map(Char, string)), string
+
+
+def test_parser_counted_repeat_error():
+    expect_parser_raise('{2}', ParseError, msg='nothing to repeat')
+    expect_parser_raise('a{2}*', ParseError, msg='multiple repeat')
+    expect_parser_raise('a*{2}', ParseError, msg='multiple repeat')
+    expect_parser_raise('a{3,2}', ParseError, msg='min repeat greater than max repeat')
+    expect_parser_raise('a{65536}', ParseError, msg='repeat count too large')
+    # counts of nested repeats multiply
+    expect_parser_raise('(a{300}){300}', ParseError, msg='pattern too large after expanding repeats')
+    expect_parser_raise('(a{65535}){65535}', ParseError, msg='pattern too large after expanding repeats')
+    expect_parser_raise('(ab){40000}', ParseError, msg='pattern too large after expanding repeats')
+    assert expanded_size(ast_from_string('(a{255}|b){256}')) == 65536
+    assert expanded_size(ast_from_string('a{65535}')) == 65535
+
+
 def test_parser_empty():
     ast = ast_from_string('')
     assert ast == Empty()
@@ -48,6 +77,11 @@ def test_perser_multiple_repeat():
             expect_parser_raise('.' + r1 + r2, ParseError, msg='multiple repeat')
 
 
+def test_parser_unbalanced_parenthesis():
+    expect_parser_raise('(a', UnexpectedEOF)
+    expect_parser_raise('a)', UnexpectedToken, msg='unbalanced parenthesis')
+
+
 def test_parser_bracket_basic():
     ast = ast_from_string('[abc]')
     assert ast == Bracket(
@@ -116,3 +150,9 @@ def test_parser_bracket_bad_range():
 
 def test_parser_predefined_range():
     assert ast_from_string('\\w\\d') == ast_from_string('[a-zA-Z0-9_][0-9]')
+
+
+def test_char_range_eq():
+    assert CharRange(start='a', end='c') == CharRange(start='a', end='c')
+    assert CharRange(start='a', end='c') != CharRange(start='a', end='d')
+    assert ast_from_string('[a-c]') != ast_from_string('[a-d]')
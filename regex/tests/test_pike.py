@@ -0,0 +1,58 @@
+import pytest
+
+from regex.api import compile
+from regex.parser import ast_from_string
+from regex.pike import PikeVM, SparseSet
+from regex.statemachine import ast_to_nfa
+from regex.tests.test_table import PATTERNS, STRINGS, table_from_string
+
+
+def pike_from_string(string):
+    return PikeVM(ast_to_nfa(ast_from_string(string)))
+
+
+def test_sparse_set():
+    s = SparseSet(10)
+    s.update([3, 1, 3, 7])
+    assert list(s) == [3, 1, 7]
+    assert 1 in s and 0 not in s and len(s) == 3
+    s.clear()
+    assert 3 not in s and len(s) == 0
+    s.update([7, 0])
+    assert list(s) == [7, 0]
+
+
+def test_pike_same_as_table():
+    for pattern in PATTERNS + ('^a|$', '^^a$$', '(a|$)(b|^)', '(a*|b)*c', '[^a]*$'):
+        table = table_from_string(pattern)
+        pike = pike_from_string(pattern)
+        assert pike.match_empty == table.match_empty, pattern
+        for string in STRINGS + ('aaa', 'bc', 'ab\n'):
+            assert pike.match_begin(string) == table.match_begin(string), (pattern, string)
+            classes = table.classify(string)
+            for pos in range(1, len(string) + 1):
+                assert pike.longest_match(string, pos) == table.longest_match(classes, pos), \
+                    (pattern, string, pos)
+
+
+def test_pike_match_starts():
+    for pattern in ('a*', 'ab|b', '^a', 'a$', '$^'):
+        dfa, pike = compile(pattern), compile(pattern, backend='pike')
+        for string in STRINGS:
+            expect = dfa.reverse_table.match_starts(dfa.reverse_table.classify(string))
+            assert pike.reverse_table.match_starts(string) == expect, (pattern, string)
+
+
+def test_pike_backend():
+    reg = compile('.*a' + '.' * 20, backend='pike')
+    assert reg.backend == 'pike'
+    assert reg.state_counts.dfa is None
+    assert reg.match_begin('xa' + 'y' * 20) == 22
+    assert reg.findall('bbba' + 'c' * 25) == ['bbba' + 'c' * 20]
+
+    with pytest.raises(ValueError):
+        compile('a', backend='pike', minimize=True)
+    with pytest.raises(ValueError):
+        reg.dump()
+    with pytest.raises(ValueError):
+        reg.stream()
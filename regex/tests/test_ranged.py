@@ -1,6 +1,8 @@
 from itertools import permutations
 
-from regex.ranged import RangeMap, RangeMapItem, RangeSet, MIN_CHAR, MAX_CHAR
+from regex.ranged import (
+    RangeMap, RangeMapItem, RangeSet, ArrayRangeMap, MIN_CHAR, MAX_CHAR,
+)
 
 
 def rm_from_pairs(pairs):
@@ -225,3 +227,60 @@ def test_rangeset_complement():
 
     run('123')
     run('1az-')
+
+
+def rangeset_chars(rs: RangeSet, limit=128):
+    return set(
+        chr(cp) for r in rs.get_true_ranges()
+        for cp in range(ord(r.start), min(ord(r.end), limit) + 1)
+    )
+
+
+def test_rangeset_from_ranges():
+    rs = RangeSet.from_ranges([('a', 'c'), ('b', 'e'), ('f', 'f'), ('x', 'z')])
+    check_start_end(rs)
+    assert [ (r.start, r.end) for r in rs.get_true_ranges() ] == [('a', 'f'), ('x', 'z')]
+    assert [ (r.start, r.end) for r in rs.get_false_ranges() ] \
+        == [(MIN_CHAR, '`'), ('g', 'w'), ('{', MAX_CHAR)]
+    assert rs.get_char('d') == RangeSet.TRUE
+    assert rs.get_char('w') == RangeSet.FALSE
+
+    assert list(RangeSet.from_ranges([]).get_true_ranges()) == []
+    rs = RangeSet.from_ranges([(MIN_CHAR, MAX_CHAR)])
+    assert [ (r.start, r.end) for r in rs.get_ranges() ] == [(MIN_CHAR, MAX_CHAR)]
+
+
+def test_rangeset_algebra():
+    def from_chars(chars):
+        return RangeSet.from_ranges((ch, ch) for ch in sorted(chars))
+
+    samples = ('', 'abc', 'bcdxyz', 'acegi', '0123456789abc')
+    for left in samples:
+        for right in samples:
+            a, b = from_chars(left), from_chars(right)
+            for rs in (a.union(b), a.intersection(b), a.difference(b), a.symmetric_difference(b)):
+                check_start_end(rs)
+            assert rangeset_chars(a.union(b)) == set(left) | set(right)
+            assert rangeset_chars(a.intersection(b)) == set(left) & set(right)
+            assert rangeset_chars(a.difference(b)) == set(left) - set(right)
+            assert rangeset_chars(a.symmetric_difference(b)) == set(left) ^ set(right)
+
+    rs = from_chars('ab')
+    rs.complement()
+    assert rangeset_chars(rs.union(from_chars('a'))) == set(map(chr, range(129))) - {'b'}
+
+    rs = from_chars('ab')
+    rs.update(from_chars('cz'))
+    assert [ (r.start, r.end) for r in rs.get_true_ranges() ] == [('a', 'c'), ('z', 'z')]
+
+
+def test_array_rangemap():
+    rm = RangeMap()
+    rm.add_range('b', 'd', {1})
+    rm.add_range('c', 'x', {2})
+    arm = ArrayRangeMap.from_rangemap(rm)
+
+    assert [ (r.start, r.end, r.value) for r in arm.get_ranges() ] \
+        == [ (r.start, r.end, r.value) for r in rm.get_ranges() ]
+    for char in ('\0', 'a', 'b', 'c', 'd', 'e', 'x', 'y', MAX_CHAR):
+        assert arm.get_char(char) == rm.get_char(char), char
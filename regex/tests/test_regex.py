@@ -1,5 +1,7 @@
 from regex.api import *
+from regex.parser import ast_from_string
 from regex.ranged import MAX_CHAR, MIN_CHAR
+from regex.statemachine import ast_to_nfa
 
 
 def run_match_begin_test(pattern, string, ans):
@@ -143,8 +145,39 @@ def test_match_begin_large_range():
     )
 
 
+def test_match_begin_counted_repeat():
+    MT('a{3}', 'aaaa', 3)
+    MT('a{3}', 'aa', -1)
+    MT('a{2,}', 'aaaaab', 5)
+    MT('a{,2}', 'aaa', 2)
+    MT('(ab|b){2,3}', 'abbabx', 5)
+    MT('[0-9]{1,4}-', '1234-', 5)
+    MT('[0-9]{1,4}-', '12345-', -1)
+    MT('a{0}b', 'b', 1)
+    MT('(a|){2,3}b', 'aab', 3)
+    MT('^a{2}$', 'aa', 2)
+    MT('^a{2}$', 'aaa', -1)
+
+
+def test_counted_repeat_states():
+    for backend in ('dfa', 'lazy', 'pike'):
+        reg = compile('.{0,200}x', backend=backend)
+        assert reg.match_begin('y' * 200 + 'x') == 201
+        assert reg.match_begin('y' * 201 + 'x') == -1
+    assert compile('[0-9]{1,64}').state_counts.dfa == 65
+    assert len(ast_to_nfa(ast_from_string('[0-9]{1,64}')).states()) < 200
+    assert compile('(ab){2,}').findall('abababxabab') == ['ababab', 'abab']
+
+
 def test_match_full():
     assert match_full('asdf', 'asdf')
     assert not match_full('asdf', '')
     assert match_full('.*', '')
     assert match_full('', '')
+
+
+def test_compile_minimize():
+    reg = compile('(ab|cb)*', minimize=True)
+    assert reg.state_counts == (5, 2)
+    assert reg.match_begin('abcbcbx') == 6
+    assert compile('(ab|cb)*').state_counts.minimized is None
@@ -0,0 +1,28 @@
+import pytest
+
+from regex.api import *
+from regex.tests.test_table import PATTERNS, STRINGS
+
+
+def test_regexset_same_as_regex():
+    rs = RegexSet(PATTERNS)
+    assert len(rs) == len(PATTERNS)
+    regs = [ compile(pattern) for pattern in PATTERNS ]
+    for string in STRINGS:
+        assert rs.match_begin(string) == [ reg.match_begin(string) for reg in regs ], string
+
+
+def test_regexset_matches():
+    rs = RegexSet([r'ERROR: \d+', r'user=\w+', 'ERROR', '.*x$'])
+    assert rs.match_begin('ERROR: 42 user=x') == [9, -1, 5, 16]
+    assert rs.matches('user=root') == [1]
+    assert rs.match_full('ERROR') == [2]
+    assert rs.matches('') == []
+    assert RegexSet(['', 'a*', '$', 'a']).matches('') == [0, 1, 2]
+
+
+def test_regexset_empty():
+    with pytest.raises(ValueError, match='at least one pattern'):
+        RegexSet([])
+    with pytest.raises(ValueError):
+        RegexSet(iter(()))
@@ -0,0 +1,77 @@
+import re
+
+from regex.api import *
+from regex.parser import ast_from_string, reverse_ast
+
+
+def naive_finditer(reg, string):
+    classes = reg.table.classify(string)
+    pos = 0
+    while pos <= len(string):
+        for start in range(pos, len(string) + 1):
+            end = reg.table.longest_match(classes, start)
+            if end >= 0:
+                yield (start, end)
+                pos = end if end > start else end + 1
+                break
+        else:
+            return
+
+
+PATTERNS = (
+    'a', 'ab|b', 'a*', 'b+', '[0-9]+', '^a', 'a$', '^$', '$', '^', '',
+    'x(ab|cb)*y', '(a|ab)(c|bcd)', r'\w+=\d+', 'a.c', '[^ ]+$',
+)
+STRINGS = ('', 'a', 'baa', 'aab', 'abab', 'k=1 v=22', 'xabcby xy', 'abcd', 'a b c', 'abc\n')
+
+
+def test_search_same_as_naive():
+    for backend in ('dfa', 'lazy', 'pike'):
+        for pattern in PATTERNS:
+            reg = compile(pattern, backend=backend)
+            for string in STRINGS:
+                assert [ m.span() for m in reg.finditer(string) ] \
+                    == list(naive_finditer(reg, string)), (pattern, string)
+
+
+def test_search_same_as_re():
+    # patterns without leftmost-first vs leftmost-longest ambiguity
+    for pattern in ('a', 'a*', 'b+', '[0-9]+', '^a', 'a$', '$', '^', '', r'\w+=\d+', '[^ ]+'):
+        # $ of re also matches before a trailing newline
+        for string in filter(lambda s: not s.endswith('\n'), STRINGS):
+            assert findall(pattern, string) == re.findall(pattern, string), (pattern, string)
+
+
+def test_search_leftmost_longest():
+    assert search('ab|abcd', 'xabcde').span() == (1, 5)
+    assert search('(a|ab)(c|bcd)', 'abcd').group() == 'abcd'
+    assert search('b', 'aaa') is None
+    assert search('', '').span() == (0, 0)
+
+
+def test_search_match_object():
+    m = search(r'\d+', 'abc 123 def')
+    assert (m.start(), m.end(), m.group(), m.string) == (4, 7, '123', 'abc 123 def')
+    assert repr(m) == "<Match span=(4, 7) match='123'>"
+
+
+def test_finditer_empty_matches():
+    assert [ m.span() for m in finditer('a*', 'baa') ] == [(0, 0), (1, 3), (3, 3)]
+    assert findall('a*', 'aab') == ['aa', '', '']
+
+
+def test_reverse_ast():
+    assert reverse_ast(ast_from_string('^ab(c|d*)$')) == ast_from_string('^(c|d*)ba$')
+
+
+def test_search_literal_prefix_linear():
+    # every 'a' is a prefix occurrence, but only real starts are extended
+    reg = compile('a[^x]*y')
+    calls = []
+    longest_match = reg.table.longest_match
+    reg.table.longest_match = lambda classes, pos=0: calls.append(pos) or longest_match(classes, pos)
+
+    assert reg.findall('a' * 20000) == []
+    assert calls == []
+    assert reg.findall('a' * 20000 + 'y') == ['a' * 20000 + 'y']
+    assert calls == [0]
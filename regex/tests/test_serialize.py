@@ -0,0 +1,105 @@
+import mmap
+import struct
+import tempfile
+
+import pytest
+
+from regex.api import *
+from regex.serialize import MAGIC, FILE_HEADER, TABLE_HEADER
+from regex.table import DEAD
+from regex.tests.test_search import PATTERNS, STRINGS
+
+
+def test_dump_load():
+    for pattern in PATTERNS + ('ERROR: [0-9]+', '\U0001f600+'):
+        reg = compile(pattern)
+        for reverse in (False, True):
+            loaded = load(reg.dump(reverse=reverse))
+            assert loaded.pattern == pattern
+            assert loaded.table.inner_start == reg.table.inner_start
+            for string in STRINGS + ('x\U0001f600\U0001f600',):
+                assert loaded.match_begin(string) == reg.match_begin(string), (pattern, string)
+                assert loaded.findall(string) == reg.findall(string), (pattern, string)
+
+
+def test_dump_load_minimized():
+    reg = compile('^ab|ac*', minimize=True)
+    loaded = load(reg.dump())
+    assert len(loaded.table) == len(reg.table)
+    assert loaded.findall('ab acc') == ['ab', 'acc']
+
+    # no inner start state, ^ only matches at the beginning
+    reg = compile('^a', minimize=True)
+    assert reg.table.inner_start == DEAD
+    loaded = load(reg.dump(reverse=True))
+    assert loaded.table.inner_start == DEAD
+    assert loaded.findall('aa') == ['a']
+    assert loaded.match_begin('ab') == 1
+
+
+def test_load_mmap():
+    reg = compile(r'ERROR: \d+', utf8=True)
+    with tempfile.TemporaryFile() as f:
+        f.write(reg.dump(reverse=True))
+        f.flush()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            loaded = load(mm)
+            assert loaded.prefilter.prefix == b'ERROR: '
+            assert loaded.search('é ERROR: 42'.encode('utf-8')).span() == (3, 12)
+            assert loaded.match_begin(b'ERROR: 1x') == 8
+            matcher = loaded.stream()
+            matcher.feed(b'ERROR')
+            matcher.feed(b': 12')
+            assert matcher.finish() == 9
+            # release the views on the mmap before closing it
+            del loaded, matcher
+
+
+def test_load_unicode():
+    loaded = load(compile(r'\w+', unicode=True).dump())
+    assert loaded.unicode
+    assert loaded.findall('été, x') == ['été', 'x']
+
+
+def test_load_errors():
+    data = compile('a').dump()
+    assert data.startswith(MAGIC)
+    with pytest.raises(ValueError):
+        load(b'XXXX' + data[4:])
+    with pytest.raises(ValueError):
+        load(data[:-8])
+    with pytest.raises(ValueError):
+        compile('a', backend='lazy').dump()
+
+
+def test_load_truncated():
+    data = compile('[a-c]+x', utf8=True).dump(reverse=True)
+    for length in range(len(data)):
+        with pytest.raises(ValueError):
+            load(data[:length])
+    with pytest.raises(ValueError, match='trailing data'):
+        load(data + b'\0' * 4)
+
+
+def test_load_corrupt():
+    data = bytearray(compile('[a-c]+x').dump())
+    header = FILE_HEADER.unpack_from(data)
+    table_offset = FILE_HEADER.size + sum(header[4:])
+    table_offset += -table_offset % 4
+    n_states, size, n_bounds, inner_start, match_empty = \
+        TABLE_HEADER.unpack_from(data, table_offset)
+
+    for fields, msg in (
+            ((n_states, size + 1, n_bounds, inner_start, match_empty), 'corrupt alphabet'),
+            ((n_states, size, n_bounds, n_states, match_empty), 'corrupt table header')):
+        corrupt = bytearray(data)
+        TABLE_HEADER.pack_into(corrupt, table_offset, *fields)
+        with pytest.raises(ValueError, match=msg):
+            load(corrupt)
+
+    # first transition of the first state
+    trans_offset = table_offset + TABLE_HEADER.size + 8 * n_bounds
+    corrupt = bytearray(data)
+    struct.pack_into('=i', corrupt, trans_offset, n_states)
+    with pytest.raises(ValueError, match='transition out of range'):
+        load(corrupt)
@@ -0,0 +1,41 @@
+from regex.api import compile
+from regex.tests.test_table import PATTERNS, STRINGS
+
+
+def split_all(string):
+    yield [string]
+    for i in range(len(string) + 1):
+        for j in range(i, len(string) + 1):
+            yield [string[:i], string[i:j], string[j:]]
+
+
+def test_stream_same_as_match_begin():
+    for backend in ('dfa', 'lazy'):
+        for pattern in PATTERNS + ('a*$', 'ab*c'):
+            reg = compile(pattern, backend=backend)
+            for string in STRINGS + ('abbbc', 'aaa'):
+                for chunks in split_all(string):
+                    matcher = reg.stream()
+                    for chunk in chunks:
+                        matcher.feed(chunk)
+                    assert matcher.finish() == reg.match_begin(string), (pattern, chunks)
+
+
+def test_stream_done():
+    matcher = compile('ab*').stream()
+    matcher.feed('abb')
+    assert not matcher.done
+    matcher.feed('bx')
+    assert matcher.done
+    matcher.feed('bbbb')
+    assert matcher.finish() == 4
+
+
+def test_stream_lazy_flush_between_chunks():
+    reg = compile('(a|b)*a(a|b)(a|b)', backend='lazy', max_states=3)
+    matcher = reg.stream()
+    matcher.feed('abab')
+    reg.match_begin('bbbbaaaabbba')     # flushes the shared cache
+    assert reg.table.flush_count > 0
+    matcher.feed('bba')
+    assert matcher.finish() == reg.match_begin('abab' + 'bba')
@@ -0,0 +1,109 @@
+from regex.parser import ast_from_string
+from regex.tokenizer import Token
+from regex.statemachine import ast_to_nfa, ε_closure, DfaState
+from regex.table import DfaTable, SubsetConstruction, DEAD, iter_bits
+
+
+def table_from_string(string):
+    return DfaTable.from_nfa(ast_to_nfa(ast_from_string(string)))
+
+
+def dfa_match_begin(dfa, string):
+    if string == '':
+        return 0 if dfa.match_empty else -1
+
+    last = 0 if dfa.is_end else -1
+    for i, ch in enumerate(string):
+        dfa = dfa.follow(ch)
+        if dfa is None:
+            return last
+        if dfa.is_end:
+            last = i + 1
+    if not dfa.is_end and dfa.is_dollar_end:
+        last = len(string)
+    return last
+
+
+PATTERNS = ('a*b', '(ab|cb)*', '[^a-c]*z', 'a(b|$)$', r'\w+\s\d', '$^', '.a.*', '')
+STRINGS = ('', 'ab', 'aaab', 'abcbab', 'xyz', 'a', 'foo_1 2', 'ac', 'ba\U0001f600')
+
+
+def test_table_start_states():
+    table = table_from_string('^ab|ac*')
+    assert table.inner_start != 0
+    assert table.longest_match(table.classify('xab'), 1) == 2
+    assert table.longest_match(table.classify('xacc'), 1) == 4
+    assert table.longest_match(table.classify('ab'), 0) == 2
+    assert table.longest_match(table.classify('xb'), 1) == -1
+
+    table = table_from_string('ab|ac*')
+    assert table.inner_start == 0
+    assert table.minimize().inner_start == 0
+
+    assert table_from_string('^a').minimize().inner_start == DEAD
+
+
+def test_iter_bits():
+    assert list(iter_bits(0)) == []
+    assert list(iter_bits(0b101001)) == [0, 3, 5]
+    assert list(iter_bits(1 << 200 | 2)) == [1, 200]
+
+
+def test_subset_construction_closures():
+    for pattern in PATTERNS + ('(a*|b)*c', '((a|)*b)*', '^a|$'):
+        sc = SubsetConstruction(ast_to_nfa(ast_from_string(pattern)))
+        for i, nfa in enumerate(sc.nfas):
+            assert set(sc.nfas_of(sc.closures[i])) == ε_closure({nfa}), pattern
+
+        states = sc.start_states()
+        assert set(sc.nfas_of(states)) == ε_closure({sc.start}, extra={Token.BEGIN()})
+        for class_id, next_states in sc.moves(states).items():
+            assert sc.move(states, class_id) == next_states
+
+
+def test_table_follow():
+    table = table_from_string('a[0-9]*')
+    assert len(table.alphabet) == 3
+    assert table.follow(0, 'b') == DEAD
+    s1 = table.follow(0, 'a')
+    assert table.is_end[s1]
+    assert table.follow(s1, '5') != DEAD
+    assert table.follow(s1, 'a') == DEAD
+    assert table.follow(s1, '\U0010ffff') == DEAD
+
+
+def test_table_match_begin_same_as_dfa():
+    for pattern in PATTERNS:
+        nfa = ast_to_nfa(ast_from_string(pattern))
+        dfa = DfaState.from_nfa(nfa)
+        array_dfa = DfaState.from_nfa(nfa, rangemap_backend='array')
+        table = table_from_string(pattern)
+        for string in STRINGS:
+            expect = dfa_match_begin(dfa, string)
+            assert table.match_begin(string) == expect, (pattern, string)
+            assert dfa_match_begin(array_dfa, string) == expect, (pattern, string)
+
+
+def test_table_minimize():
+    for pattern in PATTERNS + ('(ab|cb)*', 'abc|abd|xbc|xbd', '(a|b)*abb', 'a*$|b*$', 'a(b|c)*(d|$)'):
+        table = table_from_string(pattern)
+        minimized = table.minimize()
+        assert len(minimized) <= len(table)
+        assert minimized.minimize().trans == minimized.trans
+        for string in STRINGS + ('abb', 'ababb', 'xbd', 'abd', 'bbb', 'acbcd', 'acbc'):
+            assert minimized.match_begin(string) == table.match_begin(string), (pattern, string)
+
+    assert len(table_from_string('abc|abd|xbc|xbd').minimize()) == 4
+    assert len(table_from_string('(a|b)*abb').minimize()) == 4
+
+
+def test_nfa_states_compact():
+    nfa = ast_to_nfa(ast_from_string('(a|b*)*|c+'))
+    for state in nfa.states():
+        assert not hasattr(state, '__dict__')
+        assert len(state.epsilon) == len(set(state.epsilon))
+
+    assert nfa.start._label is None
+    assert nfa.start.label.startswith('S_')
+    nfa.start.label = 'START'
+    assert repr(nfa.start) == '<START>'
@@ -113,3 +113,30 @@ def test_tokenizer_escape_wsd():
 def test_tokenizer_escape_undefined():
     tokens = simplified_tokens('\\q\\e\\y\\i\\*\\?\\[')
     assert tokens == list('qeyi*?[')
+
+
+def test_tokenizer_repeat():
+    tokens = simplified_tokens('a{2}b{1,}c{,3}d{}')
+    assert tokens == [
+        'a', Token.REPEAT, 'b', Token.REPEAT, 'c', Token.REPEAT, 'd', '{', '}',
+    ]
+    assert [ tok.value for tok in scan('a{2}b{1,}c{,3}') if tok.type is Token.REPEAT ] \
+        == [(2, 2), (1, None), (0, 3)]
+
+
+def test_token_eq():
+    assert Token.CHAR('a') == Token.CHAR('a')
+    assert Token.CHAR('a') != Token.CHAR('b')
+    assert Token.CHAR('a') != Token.ESCAPE('a')
+    assert Token.OR() != Token.RPAR()
+    assert Token.OR() != 'a'
+    assert len({Token.CHAR('a'), Token.CHAR('a'), Token.OR()}) == 2
+
+
+def test_scan_interned():
+    tokens = scan('a(a|b)a')
+    assert tokens[0] is tokens[2] is tokens[6]
+    assert tokens[1] is scan('(')[0]
+    assert tokens[-1].type is Token.EOF
+    assert scan('') == [Token.EOF()]
+    assert token_list_from_string('a|b') == tokens[:1] + scan('|b')
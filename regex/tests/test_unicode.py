@@ -0,0 +1,58 @@
+import re
+import unicodedata
+
+import pytest
+
+from regex.api import compile
+from regex.errors import IllegalEscape
+from regex.parser import ast_from_string, RangeClass
+from regex.unicode import category_ranges, load_tables
+
+
+SAMPLES = 'aZ_09 \t\u3000\u00e9\u0660\u2167\u00b2\u4e00\u200b\U0001d7ce\U0001f600-'
+
+
+def test_tables_version():
+    version = load_tables().UNICODE_VERSION
+    assert re.fullmatch(r'\d+\.\d+\.\d+', version)
+    if version != unicodedata.unidata_version:
+        # the tables are generated with one python, the tests run on several
+        pytest.skip('tables of unicode {}, python has {}'.format(
+            version, unicodedata.unidata_version))
+
+
+def test_unicode_predefined_same_as_re():
+    for escape in ('\\w', '\\W', '\\d', '\\D', '\\s', '\\S'):
+        regex = compile(escape, unicode=True)
+        for ch in SAMPLES:
+            assert regex.match_full(ch) == bool(re.fullmatch(escape, ch)), (escape, ch)
+
+
+def test_ascii_predefined_by_default():
+    assert not compile('\\s').match_full('\u3000')
+    assert compile('\\s', unicode=True).match_full('\u3000')
+    assert not compile('\\w').match_full('\u00e9')
+    assert compile('[\\w-]+', unicode=True).match_full('\u00e9t\u00e9-x')
+
+
+def test_property():
+    for ch in SAMPLES:
+        category = unicodedata.category(ch)
+        assert compile('\\p{%s}' % category).match_full(ch)
+        assert compile('\\p%s' % category[0]).match_full(ch)
+        assert compile('\\p{%s}' % category[0]).match_full(ch)
+        assert not compile('\\P{%s}' % category).match_full(ch)
+
+    assert compile('[\\p{Lu}\\p{Nd}]+').findall('abC9\u0660d') == ['C9\u0660']
+    assert ast_from_string('\\p{Lu}') == RangeClass('\\p{Lu}', [], complement=False)
+
+
+def test_category_ranges():
+    letters = category_ranges('L')
+    assert letters[0] == (ord('A'), ord('Z'))
+    assert all(prev[1] + 1 < cur[0] for prev, cur in zip(letters, letters[1:]))
+
+    with pytest.raises(KeyError):
+        category_ranges('Xx')
+    with pytest.raises(IllegalEscape):
+        ast_from_string('\\p{Foo}')
@@ -0,0 +1,91 @@
+import mmap
+import random
+import tempfile
+
+from regex.alphabet import MAX_CP
+from regex.api import compile
+from regex.tests.test_search import PATTERNS as SEARCH_PATTERNS, STRINGS as SEARCH_STRINGS
+from regex.tests.test_table import PATTERNS, STRINGS
+from regex.utf8 import utf8_sequences, SURROGATE_MIN, SURROGATE_MAX
+
+
+def sequence_match(seq, data):
+    return len(seq) == len(data) and all(low <= b <= high for (low, high), b in zip(seq, data))
+
+
+def test_utf8_sequences():
+    assert utf8_sequences(0, 0x7f) == [[(0, 0x7f)]]
+    assert utf8_sequences(0x80, 0x7ff) == [[(0xc2, 0xdf), (0x80, 0xbf)]]
+    assert len(utf8_sequences(0, MAX_CP)) == 9
+    assert utf8_sequences(SURROGATE_MIN, SURROGATE_MAX) == []
+
+    rand = random.Random(0)
+    points = [0, 0x7f, 0x80, 0x7ff, 0x800, 0xffff, 0x10000, MAX_CP, SURROGATE_MIN - 1]
+    for _ in range(30):
+        start, end = sorted((rand.choice(points) + rand.randint(0, 300),
+                             rand.randint(0, MAX_CP)))
+        end = min(end, MAX_CP)
+        seqs = utf8_sequences(start, end)
+        for cp in [start, end] + [ rand.randint(0, MAX_CP) for _ in range(100) ]:
+            if SURROGATE_MIN <= cp <= SURROGATE_MAX:
+                continue
+            data = chr(cp).encode('utf-8')
+            matched = sum(sequence_match(seq, data) for seq in seqs)
+            assert matched == (1 if start <= cp <= end else 0), (start, end, cp)
+
+
+def test_utf8_match_begin():
+    for pattern in PATTERNS + ('[^a]+', '.', 'é+\U0001f600', '[Ā-￿]*'):
+        reg = compile(pattern)
+        breg = compile(pattern, utf8=True)
+        for string in STRINGS + ('éé\U0001f600', 'ā＀a'):
+            expected = reg.match_begin(string)
+            if expected > 0:
+                expected = len(string[:expected].encode('utf-8'))
+            data = string.encode('utf-8')
+            assert breg.match_begin(data) == expected, (pattern, string)
+            assert breg.match_begin(bytearray(data)) == expected
+            assert breg.match_begin(memoryview(data)) == expected
+
+
+def test_utf8_invalid_bytes():
+    breg = compile('.*', utf8=True)
+    assert breg.match_begin(b'ab\xffcd') == 2
+    assert breg.match_begin(b'a\xed\xa0\x80') == 1   # encoded surrogate
+    assert compile('a', utf8=True).search(b'\xff\xfea').span() == (2, 3)
+
+
+def test_utf8_search():
+    for pattern in SEARCH_PATTERNS + ('é+',):
+        reg = compile(pattern)
+        breg = compile(pattern, utf8=True)
+        for string in SEARCH_STRINGS + ('xééyé',):
+            data = string.encode('utf-8')
+            assert breg.findall(data) == [ s.encode('utf-8') for s in reg.findall(string) ]
+
+
+def test_utf8_mmap():
+    breg = compile(r'ERROR: \d+', utf8=True)
+    with tempfile.TemporaryFile() as f:
+        f.write(b'ok\n' * 1000 + 'ERROR: 42 é\n'.encode('utf-8'))
+        f.flush()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            m = breg.search(mm)
+            assert m.span() == (3000, 3009)
+            assert m.group() == b'ERROR: 42'
+            del m
+
+            matcher = breg.stream()
+            matcher.feed(mm[3000:3004])
+            matcher.feed(memoryview(b'R: 1'))
+            assert matcher.finish() == 8
+
+
+def test_utf8_str_input():
+    breg = compile('a', utf8=True)
+    try:
+        breg.match_begin('a')
+    except TypeError:
+        pass
+    else:
+        assert not 'possible'
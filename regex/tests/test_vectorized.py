@@ -0,0 +1,30 @@
+import pytest
+
+from regex.api import *
+from regex.tests.test_table import PATTERNS, STRINGS
+
+np = pytest.importorskip('numpy')
+
+
+def test_vectorized_same_as_match_begin():
+    strings = STRINGS + ('x' * 100, 'ab' * 70, 'a', '')
+    for pattern in PATTERNS + ('a+$', '[0-9]+', '\U0001f600.'):
+        for minimize in (False, True):
+            reg = compile(pattern, minimize=minimize)
+            expected = [ reg.match_begin(s) for s in strings ]
+            assert reg.match_vectorized(strings).tolist() == expected, pattern
+
+
+def test_vectorized_bytes():
+    reg = compile('é+x?', utf8=True)
+    data = [ s.encode('utf-8') for s in ('ééx', 'x', '', 'éa', 'éé') ]
+    assert reg.match_vectorized(data).tolist() == [5, -1, -1, 2, 4]
+
+
+def test_vectorized_empty_input():
+    assert compile('a').match_vectorized([]).tolist() == []
+
+
+def test_vectorized_lazy():
+    with pytest.raises(ValueError):
+        compile('a', backend='lazy').match_vectorized(['a'])
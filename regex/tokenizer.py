@@ -30,6 +30,7 @@ class Token(metaclass=TokenMeta):
     STAR = ()       # type: TokenMeta
     PLUS = ()       # type: TokenMeta
     QUESTION = ()   # type: TokenMeta
+    REPEAT = ()     # type: TokenMeta
 
     DOT = ()        # type: TokenMeta
     CHAR = ()       # type: TokenMeta
@@ -45,118 +46,187 @@ class Token(metaclass=TokenMeta):
         self.type = self.__class__
 
     def __eq__(self, other):
-        return self.type, self.value == other.type, other.value
+        return (isinstance(other, Token)
+                and self.type is other.type and self.value == other.value)
 
     def __hash__(self):
         return hash((self.type, self.value))
 
 
-def read_escape(chars: BufferedGen, in_bracket: bool) -> Token:
-    ascii_escpes = {
-        'a': '\a',
-        # 'b': '\b',
-        'f': '\f',
-        'n': '\n',
-        'r': '\r',
-        't': '\t',
-        'v': '\v',
-        '\\': '\\',
-    }
-
-    def check_hex_digits(digits):
-        return all(ch in '0123456789abcdef' for ch in digits)
-
-    ch = chars.get()
+# tokens are never mutated, the ones without a value are shared
+SPECIAL_TOKENS = {
+    '|': Token.OR(),
+    '(': Token.LPAR(),
+    ')': Token.RPAR(),
+    '*': Token.STAR(),
+    '+': Token.PLUS(),
+    '?': Token.QUESTION(),
+    '.': Token.DOT(),
+    '^': Token.BEGIN(),
+    '$': Token.END(),
+}
+LBRACKET = Token.LBRACKET()
+RBRACKET = Token.RBRACKET()
+DASH = Token.DASH()
+NOT = Token.NOT()
+EOF = Token.EOF()
+
+ASCII_ESCAPES = {
+    'a': '\a',
+    # 'b': '\b',
+    'f': '\f',
+    'n': '\n',
+    'r': '\r',
+    't': '\t',
+    'v': '\v',
+    '\\': '\\',
+}
+HEX_DIGITS = {'x': 2, 'u': 4, 'U': 8}
+
+_char_tokens = dict()
+
+
+def char_token(ch: str) -> Token:
+    """
+    Interned Token.CHAR of ch.
+    """
+    tok = _char_tokens.get(ch)
+    if tok is None:
+        tok = _char_tokens[ch] = Token.CHAR(ch)
+    return tok
+
+
+def scan_escape(string: str, pos: int, in_bracket: bool):
+    """
+    :param pos: index after the backslash
+    :return: the token and the index after the escape
+    """
+    if pos >= len(string):
+        raise IllegalEscape('\\')
+    ch = string[pos]
+    pos += 1
 
     if ch == 'b':
         if in_bracket:
-            return Token.CHAR('\b')
+            return char_token('\b'), pos
         else:
-            return Token.ESCAPE(ch)
+            return Token.ESCAPE(ch), pos
     elif ch == 'B':
         if in_bracket:
-            return Token.CHAR(ch)
+            return char_token(ch), pos
         else:
-            return Token.ESCAPE(ch)
-    if ch in ascii_escpes:
-        return Token.CHAR(ascii_escpes[ch])
+            return Token.ESCAPE(ch), pos
+    if ch in ASCII_ESCAPES:
+        return char_token(ASCII_ESCAPES[ch]), pos
     elif ch == 'A':
-        return Token.BEGIN()
+        return SPECIAL_TOKENS['^'], pos
     elif ch == 'Z':
-        return Token.END()
-    elif ch in 'xuU':
-        digits_num = {'x': 2, 'u': 4, 'U': 8}[ch]
-        digits = [ chars.get().lower() for _ in range(digits_num) ]
-        if not check_hex_digits(digits):
-            raise IllegalEscape('\\' + ch + ''.join(digits))
-        return Token.CHAR(chr(int(''.join(digits), base=16)))
+        return SPECIAL_TOKENS['$'], pos
+    elif ch in HEX_DIGITS:
+        end = pos + HEX_DIGITS[ch]
+        digits = string[pos:end].lower()
+        if len(digits) != end - pos or not all(d in '0123456789abcdef' for d in digits):
+            raise IllegalEscape('\\' + ch + digits)
+        return char_token(chr(int(digits, base=16))), end
     elif ch in 'wWsSdD':
-        return Token.ESCAPE(ch)
+        return Token.ESCAPE(ch), pos
+    elif ch in 'pP':
+        # unicode property, \pL or \p{Lu}
+        if string.startswith('{', pos):
+            end = string.find('}', pos)
+            if end < 0:
+                raise IllegalEscape(string[pos - 2:])
+            name, pos = string[pos + 1:end], end + 1
+        else:
+            name, pos = string[pos:pos + 1], pos + 1
+        if not name.isalpha():
+            raise IllegalEscape('\\' + ch + '{' + name + '}')
+        return Token.ESCAPE(ch + '{' + name + '}'), pos
     elif ch.isdecimal():
         raise NotImplementedError
     else:
-        return Token.CHAR(ch)
-
-
-def tokenize(chars: BufferedGen):
-    direct_yield = {
-        '|': Token.OR(),
-        '(': Token.LPAR(),
-        ')': Token.RPAR(),
-        # '[': Token.LBRACKET(),
-        # ']': Token.RBRACKET(),
-        '*': Token.STAR(),
-        '+': Token.PLUS(),
-        '?': Token.QUESTION(),
-        '.': Token.DOT(),
-        '^': Token.BEGIN(),
-        '$': Token.END(),
-    }
-
+        return char_token(ch), pos
+
+
+def scan_repeat(string: str, pos: int):
+    """
+    Read ``{m}``, ``{m,}``, ``{,n}`` or ``{m,n}``.
+
+    :param pos: index after ``{``
+    :return: Token.REPEAT((m, n)) with n None if unbounded and the index after it,
+             or a literal ``{`` like in re if the characters are not a repeat
+    """
+    end = pos
+    while end < len(string) and string[end] in '0123456789,':
+        end += 1
+    text = string[pos:end]
+    if string.startswith('}', end) and text and text.count(',') <= 1:
+        low, comma, high = text.partition(',')
+        if not comma:
+            high = low
+        return Token.REPEAT((int(low or 0), int(high) if high else None)), end + 1
+    return char_token('{'), pos
+
+
+def scan(string: str):
+    """
+    Tokens of a pattern, ending with Token.EOF.
+
+    :rtype: list[Token]
+    """
+    tokens = []
+    n = len(string)
+    pos = 0
     in_bracket = False
     prev = None
-    while True:
-        try:
-            ch = chars.get()
-        except StopIteration:
-            yield Token.EOF()
-            raise
+    while pos < n:
+        ch = string[pos]
+        pos += 1
 
         if in_bracket:
             if ch == '\\':
-                try:
-                    tok = read_escape(chars, in_bracket)
-                except StopIteration:
-                    raise IllegalEscape
+                tok, pos = scan_escape(string, pos, True)
             elif ch == ']':
-                if prev.type in (Token.LBRACKET, Token.NOT):
+                if prev is LBRACKET or prev is NOT:
                     # empty bracket not allowed, left bracket must follow a regular char.
-                    tok = Token.CHAR(ch)
+                    tok = char_token(ch)
                 else:
                     in_bracket = False
-                    tok = Token.RBRACKET()
+                    tok = RBRACKET
             elif ch == '^':
-                if prev.type is Token.LBRACKET:
-                    tok = Token.NOT()
-                else:
-                    tok = Token.CHAR(ch)
+                tok = NOT if prev is LBRACKET else char_token(ch)
             elif ch == '-':
-                tok = Token.DASH()
+                tok = DASH
             else:
-                tok = Token.CHAR(ch)
+                tok = char_token(ch)
         else:
-            if ch in direct_yield:
-                tok = direct_yield[ch]
-            elif ch == '[':
-                in_bracket = True
-                tok = Token.LBRACKET()
-            elif ch == '\\':
-                try:
-                    tok = read_escape(chars, in_bracket)
-                except StopIteration:
-                    raise IllegalEscape
-            else:
-                tok = Token.CHAR(ch)
+            tok = SPECIAL_TOKENS.get(ch)
+            if tok is None:
+                if ch == '[':
+                    in_bracket = True
+                    tok = LBRACKET
+                elif ch == '\\':
+                    tok, pos = scan_escape(string, pos, False)
+                elif ch == '{':
+                    tok, pos = scan_repeat(string, pos)
+                else:
+                    tok = char_token(ch)
 
+        tokens.append(tok)
         prev = tok
-        yield tok
+
+    tokens.append(EOF)
+    return tokens
+
+
+def tokenize(chars: BufferedGen):
+    """
+    Same tokens as scan(), from the characters of chars.
+    """
+    string = []
+    while True:
+        try:
+            string.append(chars.get())
+        except StopIteration:
+            break
+    yield from scan(''.join(string))
@@ -0,0 +1,128 @@
+"""
+Code point ranges of Unicode properties, for ``\\p{...}`` and the unicode mode of
+``\\w``, ``\\d``, ``\\s``.
+
+The ranges are generated offline from unicodedata into regex/unicode_tables.py,
+run ``python -m regex.unicode`` to regenerate them. The tables are imported on
+first use.
+"""
+import os
+
+
+# same definitions as the re module
+PREDEFINED_PREDICATES = {
+    'w': lambda ch: ch.isalnum() or ch == '_',
+    'd': str.isdecimal,
+    's': str.isspace,
+}
+
+_tables = None
+
+
+def load_tables():
+    global _tables
+    if _tables is None:
+        from regex import unicode_tables
+        _tables = unicode_tables
+    return _tables
+
+
+def pairs(flat):
+    """
+    :param flat: start0, end0, start1, end1, ...
+    :rtype: list[(int, int)]
+    """
+    return list(zip(flat[::2], flat[1::2]))
+
+
+def category_ranges(name: str):
+    """
+    Ranges of a general category, a major category like ``L`` is the union of its
+    subcategories.
+
+    :raise KeyError: unknown category
+    :rtype: list[(int, int)]
+    """
+    categories = load_tables().CATEGORIES
+    if name in categories:
+        return pairs(categories[name])
+
+    subs = [ cat for cat in categories if cat[0] == name ]
+    if len(name) != 1 or not subs:
+        raise KeyError(name)
+    ranges = sorted(r for cat in subs for r in pairs(categories[cat]))
+    # subcategories never overlap, only merge the adjacent ones
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        if start == merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def predefined_ranges(letter: str):
+    """
+    :param letter: one of ``wds``
+    :rtype: list[(int, int)]
+    """
+    return pairs(load_tables().PREDEFINED[letter])
+
+
+def runs(predicate, max_cp=0x10ffff):
+    """
+    Ranges of code points satisfying predicate, flattened.
+    """
+    ans = []
+    for cp in range(max_cp + 1):
+        if predicate(chr(cp)):
+            if ans and ans[-1] == cp - 1:
+                ans[-1] = cp
+            else:
+                ans.extend((cp, cp))
+    return ans
+
+
+def format_table(flat, indent='        '):
+    lines = []
+    for i in range(0, len(flat), 16):
+        lines.append(indent + ''.join('{:#x}, '.format(cp) for cp in flat[i:i + 16]).rstrip())
+    return '\n'.join(lines)
+
+
+def generate(path: str):
+    import unicodedata
+
+    category_of = [ unicodedata.category(chr(cp)) for cp in range(0x110000) ]
+    categories = dict()
+    for cp, cat in enumerate(category_of):
+        flat = categories.setdefault(cat, [])
+        if flat and flat[-1] == cp - 1:
+            flat[-1] = cp
+        else:
+            flat.extend((cp, cp))
+
+    out = [
+        '# generated by python -m regex.unicode, do not edit',
+        '',
+        'UNICODE_VERSION = {!r}'.format(unicodedata.unidata_version),
+        '',
+        'CATEGORIES = {',
+    ]
+    for cat in sorted(categories):
+        out.append('    {!r}: ('.format(cat))
+        out.append(format_table(categories[cat]))
+        out.append('    ),')
+    out.extend(('}', '', 'PREDEFINED = {'))
+    for letter, predicate in sorted(PREDEFINED_PREDICATES.items()):
+        out.append('    {!r}: ('.format(letter))
+        out.append(format_table(runs(predicate)))
+        out.append('    ),')
+    out.extend(('}', ''))
+
+    with open(path, 'w') as f:
+        f.write('\n'.join(out))
+
+
+if __name__ == '__main__':
+    generate(os.path.join(os.path.dirname(__file__), 'unicode_tables.py'))
@@ -0,0 +1,171 @@
+from regex.alphabet import Alphabet
+from regex.pike import PikeVM
+from regex.ranged import RangeSet
+from regex.statemachine import NfaState, NfaPair
+from regex.table import DfaTable, DEAD, nfa_ranges
+
+
+SURROGATE_MIN = 0xd800
+SURROGATE_MAX = 0xdfff
+BYTE_CLASSES = 257   # one class per byte, plus one for non-bytes
+
+
+def utf8_sequences(start: int, end: int):
+    """
+    Split a code point range into sequences of byte ranges. The UTF-8 encodings
+    of start..end are exactly the byte strings matched by one of the sequences.
+    Surrogates are not encodable and are left out.
+
+    :return: list of sequences, each a list of (low, high) byte ranges
+    """
+    ans = []
+    stack = [(start, end)]
+    while stack:
+        start, end = stack.pop()
+        while True:
+            if start <= SURROGATE_MAX and end >= SURROGATE_MIN:
+                if end > SURROGATE_MAX:
+                    stack.append((SURROGATE_MAX + 1, end))
+                if start >= SURROGATE_MIN:
+                    break
+                end = SURROGATE_MIN - 1
+                continue
+
+            # same encoded length
+            for max_cp in (0x7f, 0x7ff, 0xffff):
+                if start <= max_cp < end:
+                    stack.append((max_cp + 1, end))
+                    end = max_cp
+                    break
+            else:
+                if end <= 0x7f:
+                    ans.append([(start, end)])
+                    break
+
+                # every byte of start..end forms a range
+                for i in (1, 2, 3):
+                    mask = (1 << (6 * i)) - 1
+                    if start & ~mask != end & ~mask:
+                        if start & mask != 0:
+                            stack.append(((start | mask) + 1, end))
+                            end = start | mask
+                            break
+                        if end & mask != mask:
+                            stack.append((end & ~mask, end))
+                            end = (end & ~mask) - 1
+                            break
+                else:
+                    low = chr(start).encode('utf-8')
+                    high = chr(end).encode('utf-8')
+                    ans.append(list(zip(low, high)))
+                    break
+
+    return ans
+
+
+def lower_to_utf8(nfa_pair: NfaPair, *, reverse=False) -> NfaPair:
+    """
+    Copy of an NFA over code points whose transitions consume UTF-8 bytes instead,
+    bytes are represented by the characters '\\x00'..'\\xff'.
+
+    :param reverse: emit the bytes of each character in reversed order
+    """
+    old_to_new = { nfa: NfaState() for nfa in nfa_pair.states() }
+    sequence_cache = dict()
+
+    def sequence_start(seq, to):
+        # share common suffixes, eg: the trailing continuation bytes
+        key = (seq, to)
+        if key not in sequence_cache:
+            low, high = seq[0]
+            rs = RangeSet()
+            rs.add_range(chr(low), chr(high))
+            if len(seq) > 1:
+                to = sequence_start(seq[1:], to)
+            sequence_cache[key] = NfaState(charset=rs, to=to)
+        return sequence_cache[key]
+
+    for old, new in old_to_new.items():
+        new.epsilon.extend(old_to_new[nfa] for nfa in old.epsilon)
+        ranges = nfa_ranges(old)
+        if ranges is None:
+            if old.char is not None:
+                # Token.BEGIN or Token.END
+                new.char, new.to = old.char, old_to_new[old.to]
+            continue
+
+        to = old_to_new[old.to]
+        for start, end in ranges:
+            for seq in utf8_sequences(start, end):
+                if reverse:
+                    seq.reverse()
+                new.epsilon.append(sequence_start(tuple(seq), to))
+
+    return NfaPair(old_to_new[nfa_pair.start], old_to_new[nfa_pair.end])
+
+
+def any_bytes_prefix(nfa_pair: NfaPair) -> NfaPair:
+    """
+    Prefix an NFA with a loop over any byte, like ``.*`` but for invalid UTF-8 too.
+    """
+    rs = RangeSet()
+    rs.add_range('\x00', '\xff')
+    start = NfaState()
+    start.to, start.charset = start, rs
+    start.epsilon.append(nfa_pair.start)
+    return NfaPair(start, nfa_pair.end)
+
+
+class ByteTable(DfaTable):
+    """
+    DFA over bytes, matching any object supporting the buffer protocol without copying.
+
+    Every byte is its own character class, so the bytes of the buffer are used
+    as class ids directly.
+    """
+
+    @classmethod
+    def from_table(cls, table: DfaTable):
+        """
+        :param table: DFA of an NFA from lower_to_utf8()
+        """
+        byte_alphabet = Alphabet(list(range(BYTE_CLASSES)), list(range(BYTE_CLASSES)))
+        byte_to_class = [ table.alphabet.class_of_cp(b) for b in range(BYTE_CLASSES - 1) ]
+        size = table.alphabet.size
+        trans = []
+        for state in range(len(table)):
+            row = table.trans[state * size:(state + 1) * size]
+            trans.extend(row[class_id] for class_id in byte_to_class)
+            trans.append(DEAD)
+
+        return cls(
+            byte_alphabet, trans, table.is_end, table.is_dollar_end, table.match_empty,
+            inner_start=table.inner_start,
+        )
+
+    def classify(self, buffer):
+        if isinstance(buffer, str):
+            raise TypeError('a bytes-like object is required, not str')
+        return memoryview(buffer).cast('B')
+
+    def is_char_start(self, classes, pos: int) -> bool:
+        # not at a continuation byte
+        return pos == len(classes) or not 0x80 <= classes[pos] <= 0xbf
+
+
+class BytePikeVM(PikeVM):
+    """
+    PikeVM of an NFA from lower_to_utf8(), matching bytes-like objects like ByteTable.
+    """
+
+    def classify(self, buffer) -> str:
+        # one character per byte, as lower_to_utf8() represents them
+        if isinstance(buffer, str):
+            raise TypeError('a bytes-like object is required, not str')
+        return bytes(buffer).decode('latin-1')
+
+    def is_char_start(self, classes: str, pos: int) -> bool:
+        return pos == len(classes) or not '\x80' <= classes[pos] <= '\xbf'
+
+    def match_begin(self, buffer) -> int:
+        return self.longest_match(self.classify(buffer))
@@ -0,0 +1,92 @@
+"""
+Run a DFA over many strings in lockstep with numpy.
+
+The strings are classified into a padded matrix of class ids, one column per
+string, then every step advances all strings at once with one fancy indexing
+of the dense transition array.
+"""
+import numpy as np
+
+from regex.table import DfaTable, DEAD, UNKNOWN
+
+
+class VectorizedDfa:
+    """
+    Dense form of a DfaTable. DEAD becomes a real absorbing state, and an extra
+    padding class keeps every state unchanged past the end of a string.
+    """
+
+    def __init__(self, table: DfaTable):
+        if UNKNOWN in table.trans:
+            raise ValueError('table has transitions not computed yet')
+        self.table = table
+        n_states, size = len(table), table.alphabet.size
+        self.dead = n_states
+        self.pad = size
+        self.width = size + 1
+
+        trans = np.asarray(table.trans, dtype=np.int64).reshape(n_states, size)
+        trans[trans == DEAD] = self.dead
+        dense = np.empty((n_states + 1, self.width), dtype=np.int64)
+        dense[:n_states, :size] = trans
+        dense[self.dead, :] = self.dead
+        dense[:, self.pad] = np.arange(n_states + 1)
+        self.trans = dense.ravel()
+
+        self.is_end = np.append(np.asarray(table.is_end, dtype=bool), False)
+        self.is_dollar_end = np.append(np.asarray(table.is_dollar_end, dtype=bool), False)
+
+    def class_matrix(self, strings):
+        """
+        :return: class ids of shape (max length, number of strings) padded with
+                 the padding class, and the length of each string
+        """
+        strings = list(strings)
+        lengths = np.fromiter(map(len, strings), dtype=np.int64, count=len(strings))
+        max_len = int(lengths.max()) if len(strings) else 0
+        matrix = np.full((max_len, len(strings)), self.pad, dtype=np.min_scalar_type(self.pad))
+        if max_len:
+            # classify all strings in one call, one class id per character
+            joined = ('' if isinstance(strings[0], str) else b'').join(strings)
+            view = memoryview(self.table.classify(joined))
+            flat = np.frombuffer(view, dtype='u{}'.format(view.itemsize))
+            rows = np.repeat(np.arange(len(strings)), lengths)
+            starts = np.cumsum(lengths) - lengths
+            positions = np.arange(len(flat)) - np.repeat(starts, lengths)
+            matrix[positions, rows] = flat
+        return matrix, lengths
+
+    def match_begin(self, strings):
+        """
+        Same as DfaTable.match_begin() of every string.
+
+        :rtype: numpy.ndarray
+        """
+        matrix, lengths = self.class_matrix(strings)
+        n = len(lengths)
+        last = np.full(n, 0 if self.table.is_end[0] else -1, dtype=np.int64)
+        final = np.zeros(n, dtype=np.int64)   # state at the end of each string
+
+        # rows still advanced, dead or finished rows are dropped now and then
+        rows = np.arange(n)
+        states = np.zeros(n, dtype=np.int64)
+        row_lengths = lengths
+        for pos in range(matrix.shape[0]):
+            states = self.trans[states * self.width + matrix[pos, rows]]
+            accepted = self.is_end[states] & (row_lengths > pos)
+            last[rows[accepted]] = pos + 1
+
+            if pos % 16 == 15:
+                alive = (states != self.dead) & (row_lengths > pos + 1)
+                if alive.sum() * 2 < len(rows):
+                    final[rows] = states
+                    rows, states, row_lengths = rows[alive], states[alive], row_lengths[alive]
+                    if not len(rows):
+                        break
+        final[rows] = states
+
+        # padding keeps the state at the end of each string
+        dollar = ~self.is_end[final] & self.is_dollar_end[final]
+        last[dollar] = lengths[dollar]
+        last[lengths == 0] = 0 if self.table.match_empty else -1
+        return last